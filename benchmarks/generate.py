@@ -0,0 +1,157 @@
+"""Generates synthetic workbooks with the layout of the comparison and the
+Unified Standard files, of any size.
+
+Run it with `python benchmarks/generate.py OUTPUT_DIR` to write
+`comparison.xlsx` and `unified.xlsx` there.
+"""
+
+import argparse
+import os
+import random
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import standards.config as cfg  # pylint: disable=C0413
+
+WORDS = (
+    "access account administrator alarm application archive audit authentication backup "
+    "boundary certificate change client configuration connection control data database "
+    "device encryption event failure file firewall hardware identity incident integrity "
+    "interface key log maintenance monitoring network operator password patch permission "
+    "policy port privilege process protocol record recovery remote report risk role "
+    "security server service session software storage system time token update user "
+    "validation vendor version vulnerability wireless zone shall must should review "
+    "ensure document restrict verify protect manage maintain define implement approve"
+).split()
+LEVELS = ("L1", "L2", "L3")
+
+
+@dataclass
+class WorkbookSizes:
+    """Amount of criteria and worksheets of the generated workbooks."""
+
+    # Criteria in each worksheet of the comparison file
+    original_rows: int = 500
+    # Criteria in the Unified Standard
+    new_rows: int = 2000
+    sheets: int = 2
+    # Share of the criteria with several lines
+    multiline_ratio: float = 0.2
+    # Share of the original criteria that were already compared
+    completed_ratio: float = 0.1
+
+
+def sentence(rng: random.Random, min_words: int = 8, max_words: int = 25) -> str:
+    """Gets a random sentence made of the vocabulary words."""
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return " ".join(words).capitalize() + "."
+
+
+def criteria(rng: random.Random, multiline_ratio: float) -> str:
+    """Gets the text of a criteria, with several lines for some of them."""
+    lines = rng.randint(2, 5) if rng.random() < multiline_ratio else 1
+    return "\n".join(sentence(rng) for _ in range(lines))
+
+
+def mutate(rng: random.Random, text: str, ratio: float = 0.3) -> str:
+    """Gets a copy of the text with some of its words replaced."""
+    return " ".join(rng.choice(WORDS) if rng.random() < ratio else word
+                    for word in text.split(" "))
+
+
+def generate_unified_standard(path: str, sizes: WorkbookSizes,
+                              rng: random.Random) -> list[str]:
+    """Writes a Unified Standard workbook and gets the texts of its criteria."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Unified Standard")
+    sheet.append(["Unified Standard"])
+    sheet.append([])
+    sheet.append(["Criterion #", "Criteria", "Level"])
+
+    texts = []
+    for i in range(sizes.new_rows):
+        text = criteria(rng, sizes.multiline_ratio)
+        texts.append(text)
+        sheet.append([f"U{i // 10 + 1}.{i % 10 + 1}", text, rng.choice(LEVELS)])
+
+    workbook.save(path)
+    return texts
+
+
+def generate_comparison(path: str, sizes: WorkbookSizes, new_texts: list[str],
+                        rng: random.Random):
+    """Writes a comparison workbook whose criteria are partly copies of the
+    new ones with some words changed, so they have real matches."""
+    workbook = Workbook(write_only=True)
+    for worksheet in cfg.original_standards_ws[:sizes.sheets]:
+        sheet = workbook.create_sheet(worksheet)
+        sheet.append([None, worksheet])
+        sheet.append([])
+        sheet.append([None, "No.", "Criteria", "Level", None, "New No.", "New Criteria",
+                      "New Level"])
+
+        for i in range(sizes.original_rows):
+            if new_texts and rng.random() < 0.5:
+                text = mutate(rng, rng.choice(new_texts).split("\n")[0])
+            else:
+                text = criteria(rng, sizes.multiline_ratio)
+
+            compared: list[Optional[str]] = [None, None, None]
+            if rng.random() < sizes.completed_ratio:
+                compared = [f"U{i}", sentence(rng), rng.choice(LEVELS)]
+            sheet.append([None, f"{worksheet[0]}{i // 10 + 1}.{i % 10 + 1}", text,
+                          rng.choice(LEVELS), None, *compared])
+
+    workbook.save(path)
+
+
+def generate(directory: str, sizes: Optional[WorkbookSizes] = None,
+             seed: Optional[int] = 0) -> tuple[str, str]:
+    """Writes both workbooks to the directory and gets their paths."""
+    sizes = sizes or WorkbookSizes()
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    original_path = os.path.join(directory, "comparison.xlsx")
+    new_path = os.path.join(directory, "unified.xlsx")
+
+    new_texts = generate_unified_standard(new_path, sizes, rng)
+    generate_comparison(original_path, sizes, new_texts, rng)
+    return original_path, new_path
+
+
+def add_size_arguments(parser: argparse.ArgumentParser):
+    """Adds the arguments that set the size of the generated workbooks."""
+    parser.add_argument("--original-rows", type=int, default=500,
+                        help="criteria in each worksheet of the comparison file")
+    parser.add_argument("--new-rows", type=int, default=2000,
+                        help="criteria in the Unified Standard")
+    parser.add_argument("--sheets", type=int, default=2,
+                        help=f"worksheets of the comparison file, up to "
+                        f"{len(cfg.original_standards_ws)}")
+    parser.add_argument("--multiline-ratio", type=float, default=0.2,
+                        help="share of the criteria with several lines")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random texts")
+
+
+def sizes_from_arguments(args: argparse.Namespace) -> WorkbookSizes:
+    """Gets the sizes set by the arguments of `add_size_arguments`."""
+    return WorkbookSizes(args.original_rows, args.new_rows, args.sheets, args.multiline_ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", help="folder where the workbooks are written")
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate(args.directory, sizes_from_arguments(args), args.seed)
+    print(f"Wrote {paths[0]} and {paths[1]}.")
+
+
+if __name__ == "__main__":
+    main()
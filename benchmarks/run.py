@@ -0,0 +1,156 @@
+"""Times the main operations of the app on synthetic workbooks and compares
+them with a stored baseline.
+
+Run it with `python benchmarks/run.py`. The first run, or any run with
+`--save-baseline`, stores the timings in the baseline file. Later runs fail
+when an operation gets slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=C0413
+from benchmarks.generate import add_size_arguments, generate, sizes_from_arguments
+from standards.corpus import CorpusIndex
+from standards.matching import compare_standard, rank_worksheet
+from standards.search import SearchIndex
+from standards.workbooks import WriteSession, read_new_workbook, read_original_workbook
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Slowdown over the baseline that makes the benchmark fail, 0.25 is 25 %
+THRESHOLD = 0.25
+# Every operation runs this many times and the fastest run is kept
+REPEAT = 5
+# Queries typed one character at a time in the filter benchmark
+QUERIES = ("r1.", "security policy", "ensure", "xyz")
+# Updates queued before the write-back benchmark saves the workbook
+WRITES = 50
+
+
+def best_time(operation: Callable[[], Any], repeat: int) -> float:
+    """Gets the fastest of several runs of the operation, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def filter_as_typed(standards: list[dict]):
+    """Filters the standards the way the app does while a query is typed."""
+    index = SearchIndex(standards)
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            index.search(query[:end])
+        index.search("")
+
+
+def write_back(original_path: str, worksheet: str, original_standards: list[dict],
+               new_standards: list[dict]):
+    """Writes new standards to some of the original ones and saves the file."""
+    with WriteSession(original_path) as session:
+        for original, new in zip(original_standards[:WRITES], new_standards):
+            session.queue(original["id"], new["id"], new["text"], new["level"], worksheet)
+        session.flush()
+
+
+def run_benchmarks(original_path: str, new_path: str, repeat: int) -> dict[str, float]:
+    """Times every operation on the workbooks, in seconds."""
+    timings = {}
+    timings["load_workbooks"] = best_time(
+        lambda: (read_original_workbook(original_path), read_new_workbook(new_path)), repeat)
+
+    worksheets = read_original_workbook(original_path)
+    worksheet, parsed = next(iter(worksheets.items()))
+    original_standards = parsed["standards"]
+    new_standards = read_new_workbook(new_path)["standards"]
+
+    timings["build_corpus"] = best_time(lambda: CorpusIndex(new_standards), repeat)
+    index = CorpusIndex(new_standards)
+
+    timings["compare_standard"] = best_time(
+        lambda: compare_standard(original_standards[0], new_standards, index), repeat)
+    timings["compare_standard_keywords"] = best_time(
+        lambda: compare_standard(original_standards[0], new_standards, index,
+                                 ["security", "policy"]), repeat)
+    timings["rank_worksheet"] = best_time(
+        lambda: rank_worksheet(worksheet, original_standards, index, prune=True), repeat)
+    timings["filter_original"] = best_time(lambda: filter_as_typed(original_standards), repeat)
+    timings["filter_new"] = best_time(lambda: filter_as_typed(new_standards), repeat)
+    timings["write_back"] = best_time(
+        lambda: write_back(original_path, worksheet, original_standards, new_standards), repeat)
+    return timings
+
+
+def compare_with_baseline(timings: dict[str, float], baseline: dict[str, Any],
+                          threshold: float) -> list[str]:
+    """Prints every timing against the baseline and gets the regressions."""
+    regressions = []
+    for name, elapsed in timings.items():
+        reference = baseline.get("timings", {}).get(name)
+        if reference is None:
+            print(f"{name:28} {elapsed * 1000:10.1f} ms")
+            continue
+
+        change = elapsed / reference - 1 if reference else 0.0
+        print(f"{name:28} {elapsed * 1000:10.1f} ms  baseline {reference * 1000:10.1f} ms  "
+              f"{change:+7.1%}")
+        if change > threshold:
+            regressions.append(f"{name} is {change:.1%} slower than the baseline.")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_size_arguments(parser)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="file with the baseline")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these timings as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown that fails the benchmark, 0.25 is 25 %%")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs of every operation")
+    args = parser.parse_args()
+
+    sizes = sizes_from_arguments(args)
+    size = {**asdict(sizes), "seed": args.seed}
+
+    directory = tempfile.mkdtemp(prefix="standards-benchmark-")
+    try:
+        original_path, new_path = generate(directory, sizes, args.seed)
+        timings = run_benchmarks(original_path, new_path, args.repeat)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    baseline = {}
+    save_baseline = args.save_baseline or not os.path.exists(args.baseline)
+    if not save_baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("size") != size:
+            print("The baseline was measured with other workbook sizes, it is not used.")
+            baseline = {}
+
+    regressions = compare_with_baseline(timings, baseline, args.threshold)
+
+    if save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"size": size, "timings": timings}, file, indent=2)
+        print(f"Stored the baseline in {args.baseline}.")
+
+    for regression in regressions:
+        print(regression)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Checks that starting the app stays within its time budget.
+
+Imports `main` in a fresh interpreter with `-X importtime` and fails when the
+import takes longer than the budget, or when it loads a module that must wait
+until it is used. Run it from anywhere with `python benchmarks/startup.py`.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time the import of main may take, in milliseconds
+STARTUP_BUDGET_MS = 250
+# Modules that are slow to import and must only be loaded when first used
+LAZY_MODULES = ("numpy", "scipy", "sklearn", "openpyxl", "editdistance", "win32com")
+# Imports are measured several times and the fastest one is kept
+RUNS = 5
+
+
+def measure_imports(module: str = "main") -> dict[str, int]:
+    """Gets the cumulative import time of every module loaded when the module
+    is imported in a new interpreter, in microseconds."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS,
+                        help="time budget of the import, in milliseconds")
+    args = parser.parse_args()
+
+    runs = [measure_imports() for _ in range(RUNS)]
+    elapsed = min(times["main"] for times in runs) / 1000
+    slowest = sorted(runs[0].items(), key=lambda item: item[1], reverse=True)[1:6]
+
+    print(f"Importing main took {elapsed:.1f} ms (budget {args.budget:.0f} ms).")
+    for name, cumulative in slowest:
+        print(f"  {name}: {cumulative / 1000:.1f} ms")
+
+    failures = []
+    if elapsed > args.budget:
+        failures.append(f"The import is {elapsed - args.budget:.1f} ms over the budget.")
+    eager = sorted({name.split(".")[0] for name in runs[0]} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"These modules are imported at startup: {', '.join(eager)}.")
+
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,28 @@
+import sys
 import tkinter as tk
+from collections import deque
+from itertools import islice
 from tkinter import filedialog, messagebox, ttk
-
-import win32com.client
-
-from standards.inputs import get_text_comparisons, show_matches
-from standards.workbooks import (get_cell_number_from_value, get_new_standards,
-                                 get_original_standards, update_standards)
+from typing import Any, Mapping, Optional
+
+import standards.config as cfg
+from standards.cache import SimilarityCache
+from standards.columns import StandardsTable
+from standards.diagnostics import DiagnosticsWindow
+from standards.excel import get_excel_backend
+from standards.jobs import JobRunner
+from standards.matches_view import MatchesView
+from standards.review import Prefetcher, comparison_task
+from standards.search import SearchIndex
+from standards.tracing import traced
+from standards.widgets import VirtualTreeview
+from standards.workbooks import (WriteSession, get_cell_number_from_value,
+                                 get_new_standards, get_original_standards)
+
+# Time without new keystrokes before a filter is applied
+DEBOUNCE_DELAY_MS = 150
+# Matches shown at first and added by every "Show +10 More Matches"
+MATCHES_PAGE_SIZE = 10
 
 
 class StandardsHelperApp:  # pylint: disable=R0902
@@ -14,22 +31,37 @@ class StandardsHelperApp:  # pylint: disable=R0902
     def __init__(self, master):  # pylint: disable=R0915
         self.master = master
         master.title("Standards Helper")
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # State variables
         self.selected_current_file = False
         self.selected_new_file = False
-        self.current_standards = []
-        self.filtered_standards = []
+        self.current_standards = StandardsTable([])
+        self.filtered_standards: deque[Mapping[str, Any]] = deque()
         self.selected_standard = None
         self.filtered_new_standards = []
-        self.new_standards = []
+        self.current_search = SearchIndex([])
+        self.new_search = SearchIndex([])
+        self.debounce_timers = {}
+        self.new_standards = StandardsTable([])
+        self.corpus_index = None
+        self.worksheet_ranking = None
+        self.job_runner = JobRunner(master)
+        # The ranking of a worksheet outlives the comparisons of its standards
+        self.ranking_runner = JobRunner(master)
+        self.prefetcher = Prefetcher(JobRunner(master))
         self.keywords = []
         self.matches = {}
-        self.potential_new_standards = []
+        self.comparison = None
+        self.streamed_standard = None
+        self.match_ranking = None
+        self.excel_backend = None
+        self.diagnostics_window = None
         self.selected_new_standard = None
 
         # File paths
         self.current_file_path = ""
+        self.write_session = None
         self.new_file_path = ""
 
         # Worksheets
@@ -87,8 +119,8 @@ class StandardsHelperApp:  # pylint: disable=R0902
         self.filter_entry = tk.Entry(
             self.left_frame, width=70, fg="gray", font=("Calibri", 11))
         self.filter_entry.pack(pady=5)
-        self.filter_entry.bind("<KeyRelease>", lambda _: self.filter_current_standards(
-            self.filter_entry.get()))
+        self.filter_entry.bind("<KeyRelease>", lambda _: self.debounce(
+            "current", lambda: self.filter_current_standards(self.filter_entry.get())))
         self.add_placeholder(
             self.filter_entry, "Enter the name of the criteria or its No.")
 
@@ -111,6 +143,31 @@ class StandardsHelperApp:  # pylint: disable=R0902
         self.compare_button.bind(
             "<Leave>", lambda _: self.master.config(cursor=""))
 
+        self.rank_worksheet_button = tk.Button(
+            self.left_frame, text="Pre-rank Whole Worksheet", command=self.rank_current_worksheet,
+            state="disabled", width=70, font=("Calibri", 11))
+        self.rank_worksheet_button.pack(pady=5)
+        self.rank_worksheet_button.config(bg="#b3e6ff")
+        self.rank_worksheet_button.bind(
+            "<Enter>", lambda event,
+            button=self.rank_worksheet_button: self.change_cursor(event, button))
+        self.rank_worksheet_button.bind(
+            "<Leave>", lambda _: self.master.config(cursor=""))
+
+        self.progress_bar = ttk.Progressbar(
+            self.left_frame, orient="horizontal", mode="determinate", length=500, maximum=100)
+        self.progress_bar.pack(pady=5)
+
+        self.diagnostics_button = tk.Button(
+            self.left_frame, text="Diagnostics", command=self.open_diagnostics,
+            width=70, font=("Calibri", 11))
+        self.diagnostics_button.pack(pady=5)
+        self.diagnostics_button.bind(
+            "<Enter>", lambda event,
+            button=self.diagnostics_button: self.change_cursor(event, button))
+        self.diagnostics_button.bind(
+            "<Leave>", lambda _: self.master.config(cursor=""))
+
         self.right_frame = tk.Frame(self.central_frame)
         self.right_frame.pack(side=tk.RIGHT, padx=10)
 
@@ -150,21 +207,26 @@ class StandardsHelperApp:  # pylint: disable=R0902
         self.current_stds_frame = None
         self.current_standards_tree = None
         self.current_stds_scrollbar = None
-        self.process_next_std_button = None
-
-        self.filter_new_stds_entry = None
-        self.new_stds_frame = None
-        self.matching_new_standards_tree = None
-        self.new_stds_scrollbar = None
-
-        self.more_matches_frame = None
-        self.show_more_matches_button = None
-        self.show_all_matches_button = None
-
-        self.file_buttons_frame = None
-        self.write_selected_new_standard_button = None
-        self.open_selected_new_standard_button = None
-        self.reset_button = None
+        # List of matches of the compared standard, with its filter and buttons
+        self.matches_view: Optional[MatchesView] = None
+
+    def debounce(self, key, callback):
+        """Runs the callback once no new call with the same key arrives for a
+        while, so fast typing only filters once."""
+        if key in self.debounce_timers:
+            self.master.after_cancel(self.debounce_timers[key])
+        self.debounce_timers[key] = self.master.after(
+            DEBOUNCE_DELAY_MS, lambda: self.run_debounced(key, callback))
+
+    def run_debounced(self, key, callback):
+        self.debounce_timers.pop(key, None)
+        callback()
+
+    def open_diagnostics(self):
+        if self.diagnostics_window and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+        else:
+            self.diagnostics_window = DiagnosticsWindow(self.master)
 
     def populate_tree(self):
         # If the tree has items in it, clear them
@@ -203,6 +265,16 @@ class StandardsHelperApp:  # pylint: disable=R0902
             return 'green'
         return 'red'
 
+    def current_standard_values(self, standard):
+        """Gets the values shown for a standard of the current worksheet."""
+        return (standard["id"], standard["text"], standard["level"],
+                "✓" if standard["completed"] else "✗")
+
+    def new_standard_values(self, new_standard, std_id):
+        """Gets the values shown for a new standard matched against a standard."""
+        return (new_standard["id"], new_standard["text"], new_standard["level"],
+                self.matches[std_id].get(new_standard["id"], {}).get("weighted_similarity", 0))
+
     def add_placeholder(self, entry, placeholder):
         entry.insert(0, placeholder)
         entry.bind("<FocusIn>", lambda event: self.on_entry_focus_in(
@@ -227,8 +299,10 @@ class StandardsHelperApp:  # pylint: disable=R0902
             self.master.config(cursor="")
 
     def select_current_file(self):
+        self.flush_writes()
         self.current_file_path = filedialog.askopenfilename(
             filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")])
+        self.write_session = WriteSession(self.current_file_path)
 
         for checkbox in self.worksheet_radio_buttons:
             checkbox.config(state="normal")
@@ -269,25 +343,24 @@ class StandardsHelperApp:  # pylint: disable=R0902
 
         self.display_current_standards()
 
+        if self.selected_new_file:
+            self.rank_worksheet_button.config(state="normal")
+
         # Update the requirements tree
         self.obligatory_requirements['Loaded Comparisons file'] = True
         self.populate_tree()
 
     def show_only_non_complete_standards(self):
         if self.show_only_non_matched.get():
-            self.filtered_standards = [
-                std for std in self.current_standards if not std["completed"]]
+            self.filtered_standards = deque(self.current_standards.where(
+                ~self.current_standards.completed_mask()))
         else:
-            self.filtered_standards = self.current_standards
+            self.filtered_standards = deque(self.current_standards)
+        self.prefetcher.clear()
 
         if self.current_standards_tree:
-            for item in self.current_standards_tree.get_children():
-                self.current_standards_tree.delete(item)
-
-            for standard in self.filtered_standards:
-                self.current_standards_tree.insert("", "end", values=(
-                    standard["id"], standard["text"], standard["level"],
-                    "✓" if standard["completed"] else "✗"))
+            self.current_standards_tree.set_rows(
+                [self.current_standard_values(std) for std in self.filtered_standards])
 
         # Delete the text from the filters entry
         self.filter_entry.delete(0, tk.END)
@@ -311,12 +384,59 @@ class StandardsHelperApp:  # pylint: disable=R0902
         if self.selected_current_file and self.selected_standard:
             self.compare_button.config(state="normal")
 
+        # The scoring modules pull in numpy and scikit-learn, so they are only
+        # imported once there is a corpus to score
+        from standards.corpus import CorpusIndex  # pylint: disable=C0415
+        from standards.lsh import MinHashIndex  # pylint: disable=C0415
+        from standards.parallel import ParallelScorer  # pylint: disable=C0415
+
         self.new_standards = get_new_standards(self.new_file_path)
+        self.close_corpus_index()
+        self.corpus_index = CorpusIndex(self.new_standards)
+        self.corpus_index.line_scorer = ParallelScorer(self.corpus_index.lines)
+        self.corpus_index.edit_cache = SimilarityCache.for_workbook(self.new_file_path)
+        self.corpus_index.candidate_index = MinHashIndex.for_corpus(
+            self.corpus_index.normalized.collapsed_lines(), cfg.lsh_recall)
+        self.new_search = SearchIndex(self.new_standards)
+        self.worksheet_ranking = None
+        self.comparison = None
+
+        if self.selected_current_file:
+            self.rank_worksheet_button.config(state="normal")
 
         # Update the requirements tree
         self.obligatory_requirements['Loaded Unified Standards file'] = True
         self.populate_tree()
 
+    def close_corpus_index(self):
+        """Stops the worker processes and closes the cache of the loaded corpus."""
+        self.job_runner.cancel()
+        self.ranking_runner.cancel()
+        self.prefetcher.clear()
+        if self.corpus_index and self.corpus_index.line_scorer:
+            self.corpus_index.line_scorer.close()
+        if self.corpus_index and self.corpus_index.edit_cache:
+            self.corpus_index.edit_cache.close()
+
+    def on_close(self):
+        self.flush_writes(notify=False)
+        if self.write_session and self.write_session.pending:
+            answer = messagebox.askyesnocancel(
+                "Unsaved Changes",
+                f"{len(self.write_session.pending)} standard(s) could not be written to the "
+                "Excel file. Please make sure the file is not open.\n\n"
+                "Yes tries again, No discards them and closes the app, and Cancel keeps "
+                "the app open.")
+            if answer is None:
+                return
+            if answer:
+                self.on_close()
+                return
+            self.write_session.pending = {}
+
+        self.close_corpus_index()
+        self.master.destroy()
+
     def update_current_worksheet(self):
         index = self.selected_worksheet_index.get()
         self.current_worksheet = self.worksheets[index]
@@ -324,13 +444,21 @@ class StandardsHelperApp:  # pylint: disable=R0902
         if self.current_standards:
             self.display_current_standards()
 
+    @traced("app.display_current_standards")
     def display_current_standards(self):
+        # The queued updates must be in the file before it is read again
+        self.flush_writes()
+
         if not self.current_worksheet:
             worksheet = self.worksheets[0]
         else:
             worksheet = self.current_worksheet
         self.current_standards = get_original_standards(
             self.current_file_path, worksheet)
+        self.current_search = SearchIndex(self.current_standards)
+        self.worksheet_ranking = None
+        self.ranking_runner.cancel()
+        self.prefetcher.clear()
 
         if self.current_standards_tree:
             self.current_standards_tree.destroy()
@@ -344,7 +472,7 @@ class StandardsHelperApp:  # pylint: disable=R0902
         self.current_stds_frame = tk.Frame(self.master)
         self.current_stds_frame.pack(pady=10)
 
-        self.current_standards_tree = ttk.Treeview(
+        self.current_standards_tree = VirtualTreeview(
             self.current_stds_frame, columns=("No.", "Criteria", "Level", "Completed"), show="headings",
             selectmode="browse")
 
@@ -367,71 +495,83 @@ class StandardsHelperApp:  # pylint: disable=R0902
             in_=self.current_stds_frame, side="left", fill="both", expand=True)
 
         self.current_stds_scrollbar = ttk.Scrollbar(
-            self.current_stds_frame, orient="vertical", command=self.current_standards_tree.yview)
-        self.current_standards_tree.configure(
-            yscrollcommand=self.current_stds_scrollbar.set)
+            self.current_stds_frame, orient="vertical")
+        self.current_standards_tree.set_scrollbar(self.current_stds_scrollbar)
         self.current_stds_scrollbar.pack(side="right", fill="y")
 
-        for standard in self.current_standards:
-            if standard:
-                self.current_standards_tree.insert("", "end", values=(
-                    standard["id"], standard["text"], standard["level"],
-                    "✓" if standard["completed"] else "✗"))
+        self.current_standards_tree.set_rows(
+            [self.current_standard_values(std) for std in self.current_standards if std])
 
         self.current_standards_tree.bind(
             "<ButtonRelease-1>", self.on_treeview_select)
 
+    def rank_current_worksheet(self):
+        """Ranks every standard of the current worksheet so that the next
+        comparisons only have to read their precomputed values."""
+        if self.corpus_index and self.current_standards:
+            if self.ranking_runner.busy and not messagebox.askyesno(
+                    "Ranking in Progress",
+                    "The worksheet is already being ranked. Do you want to start over?"):
+                return
+
+            from standards.matching import rank_worksheet  # pylint: disable=C0415
+
+            # The prepared comparisons wait, so they do not slow the ranking down
+            self.prefetcher.pause()
+            worksheet = self.current_worksheet or self.worksheets[0]
+            current_standards = self.current_standards
+            corpus_index = self.corpus_index
+            keywords = list(self.keywords)
+
+            self.progress_bar["value"] = 0
+            self.ranking_runner.submit(
+                lambda job: rank_worksheet(worksheet, current_standards, corpus_index, keywords,
+                                           on_progress=job.report),
+                self.on_worksheet_ranked, self.update_progress, self.on_ranking_error)
+
+    def on_worksheet_ranked(self, ranking):
+        self.worksheet_ranking = ranking
+        self.progress_bar["value"] = 100
+        self.prefetch_next_standards()
+        self.show_popup(
+            "Worksheet Ranked",
+            f"Ranked {len(ranking.rows)} standards of the {ranking.worksheet} worksheet.")
+
     def process_next_standard(self):
         if self.filtered_standards and self.current_standards_tree:
-            self.filtered_standards.pop(0)
+            self.filtered_standards.popleft()
 
-            if self.current_standards_tree:
-                self.current_standards_tree.delete(
-                    self.current_standards_tree.get_children()[0])
+            if self.current_standards_tree.rows:
+                self.current_standards_tree.delete_row(0)
 
             if self.filtered_standards:
-                self.current_standards_tree.selection_set(
-                    self.current_standards_tree.get_children()[0])
-                self.selected_standard = self.current_standards_tree.item(
-                    self.current_standards_tree.get_children()[0])["values"]
+                self.current_standards_tree.select(0)
+                self.selected_standard = self.current_standards_tree.selected_values()
                 self.start_comparison()
             else:
                 self.show_popup(
                     "End of List", "You have reached the end of the list.")
 
     def filter_current_standards(self, criteria):
-        self.filtered_standards = []
-        if criteria == "":  # If the entry is empty, show all standards
-            self.filtered_standards = self.current_standards
-        else:
-            for standard in self.current_standards:
-                if standard and standard["text"] and standard["id"]:
-                    if standard["id"].startswith(criteria) or \
-                            criteria in standard["id"].lower() or \
-                        standard["text"].lower().startswith(criteria.lower()) or \
-                            criteria in standard["text"].lower():
-                        self.filtered_standards.append(standard)
+        self.filtered_standards = deque(self.current_search.search(criteria))
 
         # Check if only the non-completed standards should be shown
         if self.show_only_non_matched.get():
-            self.filtered_standards = [
-                std for std in self.filtered_standards if not std["completed"]]
+            self.filtered_standards = deque(
+                std for std in self.filtered_standards if not std["completed"])
 
-        # Enable the process_next_std_button if there are more than 1 standards
-        if len(self.filtered_standards) > 1 and self.process_next_std_button:
-            if self.process_next_std_button:
-                self.process_next_std_button.config(state="normal")
+        # The next standards of the queue changed
+        self.prefetcher.clear()
+        self.debounce("prefetch", self.prefetch_next_standards)
 
-        # Clear the Treeview
-        if self.current_standards_tree:
-            for item in self.current_standards_tree.get_children():
-                self.current_standards_tree.delete(item)
+        # Enable the process next standard button if there are more than 1 standards
+        if len(self.filtered_standards) > 1 and self.matches_view:
+            self.matches_view.process_next_button.config(state="normal")
 
-            # Populate the Treeview with filtered standards
-            for standard in self.filtered_standards:
-                self.current_standards_tree.insert("", "end", values=(
-                    standard["id"], standard["text"], standard["level"],
-                    "✓" if standard["completed"] else "✗"))
+        # Show the filtered standards in the Treeview
+        if self.current_standards_tree:
+            self.current_standards_tree.set_rows(
+                [self.current_standard_values(std) for std in self.filtered_standards])
 
         # Update the requirements tree
         self.optional_requirements['Entered criteria name/No.'] = bool(
@@ -440,44 +580,42 @@ class StandardsHelperApp:  # pylint: disable=R0902
 
     def filter_new_standards(self, criteria):
         # This function filters the new standards based on the criteria entered
-        # in the filter_new_stds_entry. The criteria may match the ID or the text
+        # in the filter of the matches. The criteria may match the ID or the text
         # of the new standard.
-        self.filtered_new_standards = []
-        if criteria == "":  # If the entry is empty, show all standards
-            self.filtered_new_standards = self.potential_new_standards
-        else:
-            for standard in self.potential_new_standards:
-                if standard and standard["text"] and standard["id"]:
-                    if standard["id"].startswith(criteria) or \
-                            criteria in standard["id"].lower() or \
-                        standard["text"].lower().startswith(criteria.lower()) or \
-                            criteria in standard["text"].lower():
-                        self.filtered_new_standards.append(standard)
-
-        # Clear the Treeview
-        if self.matching_new_standards_tree and self.selected_standard:
-            for item in self.matching_new_standards_tree.get_children():
-                self.matching_new_standards_tree.delete(item)
-
-            # Populate the Treeview with filtered standards
-            for standard in self.filtered_new_standards:
-                self.matching_new_standards_tree.insert("", "end", values=(
-                    standard["id"], standard["text"], standard["level"],
-                    self.matches[self.selected_standard[0]].get(
-                        standard["id"], {}).get("weighted_similarity", 0)))
+        if self.match_ranking is None:
+            return
+
+        # The index covers every new standard, the ranking keeps its matches
+        self.filtered_new_standards = self.match_ranking.order(
+            self.new_search.search(criteria))
+
+        # Show the filtered standards in the Treeview
+        if self.matches_view and self.selected_standard:
+            self.matches_view.tree.set_rows(
+                [self.new_standard_values(std, self.selected_standard[0])
+                 for std in self.filtered_new_standards])
 
     def filter_keywords(self, keywords_input):
         self.keywords = [kw.strip() for kw in keywords_input.split(
             ",") if kw.strip()] if keywords_input else []
 
+        # The prepared comparisons were weighed with the previous keywords
+        self.prefetcher.clear()
+        self.debounce("prefetch", self.prefetch_next_standards)
+
         # Update the requirements tree
         self.optional_requirements['Entered keyword(s)'] = bool(self.keywords)
         self.populate_tree()
 
     def on_treeview_select(self, _):
+        # A comparison of the previously selected standard is no longer needed
+        self.job_runner.cancel()
+        self.progress_bar["value"] = 0
+
         if self.current_standards_tree:
-            item = self.current_standards_tree.selection()[0]
-            standard = self.current_standards_tree.item(item)["values"]
+            standard = self.current_standards_tree.selected_values()
+            if not standard:
+                return
             self.selected_standard = standard
 
             if self.selected_current_file and self.selected_new_file:
@@ -501,245 +639,128 @@ class StandardsHelperApp:  # pylint: disable=R0902
         self.populate_tree()
 
     def on_matching_treeview_select(self, _):
-        if self.matching_new_standards_tree:
-            item = self.matching_new_standards_tree.selection()[0]
-            standard = self.matching_new_standards_tree.item(item)["values"]
+        if self.matches_view:
+            standard = self.matches_view.tree.selected_values()
+            if not standard:
+                return
             self.selected_new_standard = standard
+            self.matches_view.set_selection_enabled(True)
 
-        if self.write_selected_new_standard_button:
-            self.write_selected_new_standard_button.config(state="normal")
-
-        if self.open_selected_new_standard_button:
-            self.open_selected_new_standard_button.config(state="normal")
-
-    def start_comparison(self):  # pylint: disable=R0915
+    def start_comparison(self):
         if self.selected_standard:
             curr_std = self.selected_standard[0]
-            self.matches = {self.selected_standard[0]: {}}
-            original_standard = next(
-                (std for std in self.current_standards if std["id"] == self.selected_standard[0]), None)
+            original_standard = self.current_standards.get(curr_std)
         else:
             curr_std = "Unknown"
-            self.matches = {}
             original_standard = None
 
-        if original_standard:
-            for new_standard in self.new_standards:
-                if new_standard["text"] and original_standard["text"]:
-                    cosine_sim, edit_dist = get_text_comparisons(
-                        original_standard["text"], new_standard["text"])
-
-                    if self.keywords:
-                        cosine_weight = 0.3
-                        edit_weight = 0.3
-                        keyword_weight = 0.4
-
-                        keyword_proportion = len([kw for kw in self.keywords
-                                                  if kw in new_standard["text"]]) / len(self.keywords)
-                        weighted_similarity = cosine_sim * cosine_weight + edit_dist * \
-                            edit_weight + keyword_proportion * keyword_weight
-
-                        self.matches[curr_std][new_standard["id"]] = {
-                            "weighted_similarity": round(100 * weighted_similarity, 2),
-                            "cosine": cosine_sim,
-                            "edit": edit_dist,
-                            "keyword_proportion": keyword_proportion,
-                        }
-                    else:
-                        cosine_weight = 0.5
-                        edit_weight = 0.5
-
-                        weighted_similarity = cosine_sim * cosine_weight + \
-                            edit_dist * edit_weight
-
-                        self.matches[curr_std][new_standard["id"]] = {
-                            "weighted_similarity": round(100 * weighted_similarity, 2),
-                            "cosine": cosine_sim,
-                            "edit": edit_dist,
-                        }
-
+        # The next standard of the queue may already be compared
+        result = self.prefetcher.take(curr_std) if original_standard else None
+        if result:
+            self.job_runner.cancel()
+            self.show_comparison(result)
+            return
+
+        # The prepared comparisons wait, so they do not slow this one down
+        self.prefetcher.pause()
+        compare = self.comparison_task(stream=True)
+        self.streamed_standard = None
+        self.progress_bar["value"] = 0
+        self.job_runner.submit(lambda job: compare(curr_std, original_standard, job),
+                               self.show_comparison, self.update_progress, self.on_job_error,
+                               self.show_partial_matches)
+
+    def comparison_task(self, stream=False):
+        """Gets the task that compares an original standard with the current
+        state of the app."""
+        return comparison_task(self.new_standards, self.corpus_index, self.keywords,
+                               self.worksheet_ranking, self.comparison, MATCHES_PAGE_SIZE,
+                               stream)
+
+    def prefetch_next_standards(self):
+        """Compares the standards after the current one of the queue in the
+        background, unless a comparison or the ranking is already running."""
+        if self.corpus_index and self.match_ranking is not None and \
+                not self.job_runner.busy and not self.ranking_runner.busy:
+            compare = self.comparison_task()
+            self.prefetcher.start(islice(self.filtered_standards, 1, None),
+                                  lambda standard, job: compare(standard["id"], standard, job))
+
+    def update_progress(self, fraction):
+        self.progress_bar["value"] = 100 * fraction
+
+    def on_job_error(self, error):
+        self.progress_bar["value"] = 0
+        self.streamed_standard = None
+        self.show_error_popup("Error", f"The comparison failed: {error}")
+
+    def on_ranking_error(self, error):
+        self.progress_bar["value"] = 0
+        self.show_error_popup("Error", f"The ranking of the worksheet failed: {error}")
+
+    @traced("app.show_comparison")
+    def show_comparison(self, result):
+        curr_std, original_standard, self.matches, self.match_ranking, self.comparison = result
+        self.progress_bar["value"] = 100
+
+        from standards.inputs import show_matches  # pylint: disable=C0415
         show_matches(original_standard, self.matches, curr_std)
 
-        # Add the matching new standards to self.potential_new_standards
-        self.potential_new_standards = []
-        sorted_new_standards = sorted(self.new_standards, key=lambda x: self.matches[curr_std].get(
-            x["id"], {}).get("weighted_similarity", 0), reverse=True)
-
-        for new_standard in sorted_new_standards:
-            if new_standard["id"] in self.matches[curr_std]:
-                self.potential_new_standards.append(new_standard)
-
-        if self.process_next_std_button:
-            self.process_next_std_button.destroy()
-
-        self.process_next_std_button = tk.Button(
-            self.master, text="Process Next Standard (>>>)", command=self.process_next_standard,
-            width=114, font=("Calibri", 11))
-        self.process_next_std_button.pack(pady=5)
-        self.process_next_std_button.config(bg="#b3ffb3")
-        self.process_next_std_button.bind(
-            "<Enter>", lambda event,
-            button=self.process_next_std_button: self.change_cursor(event, button))
-        self.process_next_std_button.bind(
-            "<Leave>", lambda _: self.master.config(cursor=""))
-
-        if len(self.filtered_standards) == 1:
-            self.process_next_std_button.config(state="disabled")
-
-        # Display the matching new standards in a Treeview
-        if self.matching_new_standards_tree:
-            self.matching_new_standards_tree.destroy()
-
-        # Destroy the previous frame and scrollbar if they exist
-        if self.more_matches_frame:
-            self.more_matches_frame.destroy()
-
-        if self.file_buttons_frame:
-            self.file_buttons_frame.destroy()
-
-        if self.new_stds_frame:
-            self.new_stds_frame.destroy()
-
-        if self.new_stds_scrollbar:
-            self.new_stds_scrollbar.destroy()
-
-        # Entry to allow filtering of new standards
-        if self.filter_new_stds_entry:
-            self.filter_new_stds_entry.destroy()
-
-        self.filter_new_stds_entry = tk.Entry(
-            self.master, width=114, fg="gray", font=("Calibri", 11))
-        self.filter_new_stds_entry.pack(pady=5)
-        self.filter_new_stds_entry.bind("<KeyRelease>", lambda _: self.filter_new_standards(
-            self.filter_new_stds_entry.get()))
-        self.add_placeholder(self.filter_new_stds_entry,
-                             "Enter the name of the criteria or its No.")
-
-        self.new_stds_frame = tk.Frame(self.master)
-        self.new_stds_frame.pack(pady=10)
-
-        self.matching_new_standards_tree = ttk.Treeview(
-            self.new_stds_frame, columns=("No.", "New Criteria", "Level", "Similarity"), show="headings")
-        self.matching_new_standards_tree.heading("No.", text="No.")
-        self.matching_new_standards_tree.heading(
-            "New Criteria", text="New Criteria")
-        self.matching_new_standards_tree.heading("Level", text="Level")
-        self.matching_new_standards_tree.heading(
-            "Similarity", text="Similarity")
-        self.matching_new_standards_tree.column("#0", width=0, stretch=tk.NO)
-        self.matching_new_standards_tree.column("No.", width=50, stretch=tk.NO)
-        self.matching_new_standards_tree.column(
-            "New Criteria", width=650, stretch=tk.NO)
-        self.matching_new_standards_tree.column(
-            "Level", width=100, stretch=tk.NO)
-        self.matching_new_standards_tree.column(
-            "Similarity", width=100, stretch=tk.NO)
-        self.matching_new_standards_tree.pack(
-            in_=self.new_stds_frame, side="left", fill="both", expand=True)
-
-        self.new_stds_scrollbar = ttk.Scrollbar(
-            self.new_stds_frame, orient="vertical", command=self.matching_new_standards_tree.yview)
-        self.matching_new_standards_tree.configure(
-            yscrollcommand=self.new_stds_scrollbar.set)
-        self.new_stds_scrollbar.pack(side="right", fill="y")
-
-        self.matching_new_standards_tree.bind(
-            "<ButtonRelease-1>", self.on_matching_treeview_select)
+        # The widgets shown while the matches streamed in are kept, with the
+        # position and selection of the list
+        view = self.matches_view
+        streamed = view is not None and self.streamed_standard == curr_std
+        self.streamed_standard = None
+        if view is None or not streamed:
+            view = self.build_matches_view()
+        view.set_paging_enabled(True)
 
         # Initially, show only the top 10 matches
-        for new_standard in self.potential_new_standards[:10]:
-            self.matching_new_standards_tree.insert("", "end", values=(
-                new_standard["id"], new_standard["text"], new_standard["level"],
-                self.matches[curr_std].get(new_standard["id"], {}).get("weighted_similarity", 0)))
-
-        # Add two buttons side by side to show +10 more matches or to show all matches
-        if self.more_matches_frame:
-            self.more_matches_frame.destroy()
-
-        self.more_matches_frame = tk.Frame(self.master)
-        self.more_matches_frame.pack(pady=5)
-
-        self.show_more_matches_button = tk.Button(
-            self.more_matches_frame, text="Show +10 More Matches",
-            command=self.show_more_matches, width=30, font=("Calibri", 11))
-        self.show_more_matches_button.pack(side=tk.LEFT, padx=5)
-        self.show_more_matches_button.config(bg="#b3ffb3")
-        self.show_more_matches_button.bind(
-            "<Enter>", lambda event,
-            button=self.show_more_matches_button: self.change_cursor(event, button))
-        self.show_more_matches_button.bind(
-            "<Leave>", lambda _: self.master.config(cursor=""))
-
-        self.show_all_matches_button = tk.Button(
-            self.more_matches_frame, text="Show All Matches",
-            command=self.show_all_matches, width=30, font=("Calibri", 11))
-        self.show_all_matches_button.pack(side=tk.LEFT, padx=5)
-        self.show_all_matches_button.config(bg="#b3e6ff")
-        self.show_all_matches_button.bind(
-            "<Enter>", lambda event,
-            button=self.show_all_matches_button: self.change_cursor(event, button))
-        self.show_all_matches_button.bind(
-            "<Leave>", lambda _: self.master.config(cursor=""))
-
-        if self.write_selected_new_standard_button:
-            self.write_selected_new_standard_button.destroy()
-
-        if self.open_selected_new_standard_button:
-            self.open_selected_new_standard_button.destroy()
-
-        self.file_buttons_frame = tk.Frame(self.master)
-        self.file_buttons_frame.pack(pady=5)
-
-        # Button that writes the selected_new_standard to the Excel file
-        self.write_selected_new_standard_button = tk.Button(
-            self.file_buttons_frame, text="Write Selected New Standard",
-            command=self.write_selected_new_standard, width=30, font=("Calibri", 11))
-        self.write_selected_new_standard_button.pack(side=tk.LEFT, padx=5)
-        self.write_selected_new_standard_button.config(bg="#ff9999")
-        self.write_selected_new_standard_button.bind(
-            "<Enter>", lambda event,
-            button=self.write_selected_new_standard_button: self.change_cursor(event, button))
-        self.write_selected_new_standard_button.bind(
-            "<Leave>", lambda _: self.master.config(cursor=""))
-        self.write_selected_new_standard_button.config(state="disabled")
-
-        # Button that opens the selected_new_standard in Excel
-        self.open_selected_new_standard_button = tk.Button(
-            self.file_buttons_frame, text="Open Selected New Standard in Excel",
-            command=lambda: self.open_file(self.selected_new_standard), width=30, font=("Calibri", 11))
-        self.open_selected_new_standard_button.pack(side=tk.LEFT, padx=5)
-        self.open_selected_new_standard_button.config(bg="#b3e6ff")
-        self.open_selected_new_standard_button.bind(
-            "<Enter>", lambda event,
-            button=self.open_selected_new_standard_button: self.change_cursor(event, button))
-        self.open_selected_new_standard_button.bind(
-            "<Leave>", lambda _: self.master.config(cursor=""))
-        self.open_selected_new_standard_button.config(state="disabled")
-
-        if self.reset_button:
-            self.reset_button.destroy()
-
-        # Button that resets the app without unloading the files
-        self.reset_button = tk.Button(
-            self.master, text="Reset", command=self.reset_state, width=30, font=("Calibri", 11))
-        self.reset_button.pack(pady=5)
-        self.reset_button.config(bg="#ff9999")
-        self.reset_button.bind(
-            "<Enter>", lambda event,
-            button=self.reset_button: self.change_cursor(event, button))
-        self.reset_button.bind(
-            "<Leave>", lambda _: self.master.config(cursor=""))
+        view.tree.set_rows(
+            [self.new_standard_values(std, curr_std)
+             for std in self.match_ranking.next_page(MATCHES_PAGE_SIZE)],
+            keep_position=streamed)
+
+        # Prepare the next standards of the queue while this one is reviewed
+        self.prefetch_next_standards()
+
+    def show_partial_matches(self, partial):
+        """Shows the best matches found so far while the comparison runs."""
+        curr_std, top = partial
+        self.matches = {curr_std: top}
+        view = self.matches_view
+        if self.streamed_standard != curr_std or view is None:
+            self.streamed_standard = curr_std
+            self.match_ranking = None
+            view = self.build_matches_view()
+            # The rest of the matches are only ranked once every standard is scored
+            view.set_paging_enabled(False)
+
+        view.tree.set_rows(
+            [self.new_standard_values(self.new_standards.get(new_id), curr_std)
+             for new_id in top], keep_position=True)
+
+    def build_matches_view(self) -> MatchesView:
+        """Replaces the list of matches with an empty one."""
+        if self.matches_view:
+            self.matches_view.destroy()
+
+        self.matches_view = MatchesView(self, len(self.filtered_standards) == 1)
+        return self.matches_view
 
     def open_file(self, file_path):
         cell_num = get_cell_number_from_value(file_path[0], self.new_file_path)
 
         if cell_num:
-            excel = win32com.client.Dispatch("Excel.Application")
-            excel.Visible = True
-            workbook = excel.Workbooks.Open(self.new_file_path)
-            worksheet = workbook.Worksheets("Unified Standard")
-            worksheet.Activate()
-            worksheet.Range(cell_num[1]).Select()
+            if self.excel_backend is None:
+                self.excel_backend = get_excel_backend(cfg.excel_backend)
+
+            if not self.excel_backend.open_cell(self.new_file_path, "Unified Standard",
+                                                cell_num[1]):
+                self.show_popup(
+                    "Standard Location",
+                    f"The standard {file_path[0]} is in the cell {cell_num[1]} of the "
+                    "Unified Standard worksheet.")
         else:
             self.show_error_popup(
                 "Error", "The given standard was not found in the Unified Standards file.")
@@ -747,58 +768,58 @@ class StandardsHelperApp:  # pylint: disable=R0902
     def write_selected_new_standard(self):
         if self.selected_new_standard:
             standard = self.selected_new_standard
-            # Update the Excel file with the selected new standard
-            if self.selected_standard and self.current_worksheet and standard:
-                success = update_standards(
-                    self.selected_standard[0], standard[0], standard[1], standard[2], self.current_worksheet, self.current_file_path)
-                if success:
-                    self.show_popup(
-                        "Success", "The Excel file has been updated successfully.")
-
-                    # Update the current standard as completed and redisplay the standards
-                    for std in self.current_standards:
-                        if std["id"] == self.selected_standard[0] and not std["completed"]:
-                            std["completed"] = True
-                            break
-
-                    # Get the current selection from the treeview
-                    if self.current_standards_tree:
-                        selected_item_idx = self.current_standards_tree.index(
-                            self.current_standards_tree.selection()[0])
-                    else:
-                        selected_item_idx = None
-
-                    # Clear the of current standards and display them again
-                    current_standards = []
-                    if self.current_standards_tree:
-                        for item in self.current_standards_tree.get_children():
-                            current_standards.append(
-                                self.current_standards_tree.item(item)["values"])
-
-                        # Clear the Treeview
-                        for item in self.current_standards_tree.get_children():
-                            self.current_standards_tree.delete(item)
-
-                        # Populate the Treeview with the updated standards
-                        for standard in current_standards:
-                            print(f"Standard: {standard}")
-                            if standard[0] == self.selected_standard[0]:
-                                self.current_standards_tree.insert("", "end", values=(
-                                    standard[0], standard[1], standard[2], "✓"))
-                            else:
-                                self.current_standards_tree.insert("", "end", values=(
-                                    standard[0], standard[1], standard[2], "✓" if standard[3] == "✓" else "✗"))
-
-                        # Reselect the current standard
-                        if selected_item_idx:
-                            self.current_standards_tree.selection_set(
-                                self.current_standards_tree.get_children()[selected_item_idx])
-
-                else:
-                    self.show_error_popup(
-                        "Error", "An error occurred while updating the Excel file.\nPlease make sure the file is not open.")
+            # Queue the update of the Excel file with the selected new standard
+            if self.selected_standard and self.current_worksheet and standard and \
+                    self.write_session:
+                self.write_session.queue(
+                    self.selected_standard[0], standard[0], standard[1], standard[2],
+                    self.current_worksheet)
+                # The standard is marked as completed once the file is written,
+                # along with any update a previous save could not write
+                self.flush_writes()
+
+    def flush_writes(self, notify=True):
+        """Writes the queued updates and marks the written standards as
+        completed. Without `notify`, no popup reports the result."""
+        if not self.write_session or not self.write_session.pending:
+            return
+
+        results = self.write_session.flush()
+        written = [std_id for (_, std_id), success in results.items() if success]
+
+        # Redraw only the rows of the written standards of the worksheet shown
+        for (worksheet, std_id), success in results.items():
+            std = self.current_standards.get(std_id) \
+                if success and worksheet == self.current_worksheet else None
+            if std:
+                std["completed"] = True
+                if self.current_standards_tree:
+                    self.current_standards_tree.update_row(
+                        std["id"], self.current_standard_values(std))
+
+        if not notify:
+            return
+
+        if written:
+            self.show_popup(
+                "Success",
+                f"The Excel file has been updated successfully ({len(written)} standard(s)).")
+        elif self.write_session.pending:
+            self.show_error_popup(
+                "Error", "An error occurred while updating the Excel file.\nPlease make sure the file is not open.")
+
+        if len(written) < len(results) and not self.write_session.pending:
+            missing = ", ".join(str(std_id) for (_, std_id), success in results.items()
+                                if not success)
+            self.show_error_popup(
+                "Error", f"The following standards were not found in the Excel file: {missing}")
+            # Show what is actually in the file
+            self.display_current_standards()
 
     def reset_state(self):
+        self.job_runner.cancel()
+        self.progress_bar["value"] = 0
+
         # Clear the content of the ID/Name Entry
         if self.filter_entry:
             self.filter_entry.delete(0, tk.END)
@@ -836,36 +857,9 @@ class StandardsHelperApp:  # pylint: disable=R0902
             self.compare_button.config(state="disabled")
 
         # Remove the elements that were created during the comparison
-        if self.process_next_std_button:
-            self.process_next_std_button.destroy()
-            self.process_next_std_button = None
-
-        if self.matching_new_standards_tree:
-            self.matching_new_standards_tree.destroy()
-
-        if self.more_matches_frame:
-            self.more_matches_frame.destroy()
-
-        if self.new_stds_frame:
-            self.new_stds_frame.destroy()
-
-        if self.new_stds_scrollbar:
-            self.new_stds_scrollbar.destroy()
-
-        if self.filter_new_stds_entry:
-            self.filter_new_stds_entry.destroy()
-
-        if self.file_buttons_frame:
-            self.file_buttons_frame.destroy()
-
-        if self.write_selected_new_standard_button:
-            self.write_selected_new_standard_button.destroy()
-
-        if self.open_selected_new_standard_button:
-            self.open_selected_new_standard_button.destroy()
-
-        if self.reset_button:
-            self.reset_button.destroy()
+        if self.matches_view:
+            self.matches_view.destroy()
+            self.matches_view = None
 
         # Reset the current standard selected
         self.selected_standard = None
@@ -882,28 +876,26 @@ class StandardsHelperApp:  # pylint: disable=R0902
             "Currently selected standard: None")
 
     def show_more_matches(self):
-        if self.matching_new_standards_tree and self.show_more_matches_button:
-            for new_standard in self.potential_new_standards[len(self.matching_new_standards_tree.get_children()):len(self.matching_new_standards_tree.get_children()) + 10]:
-                if self.selected_standard:
-                    self.matching_new_standards_tree.insert("", "end", values=(
-                        new_standard["id"], new_standard["text"], new_standard["level"],
-                        self.matches[self.selected_standard[0]].get(
-                            new_standard["id"], {}).get("weighted_similarity", 0)))
+        if self.matches_view and self.match_ranking is not None:
+            if self.selected_standard:
+                self.matches_view.tree.set_rows(
+                    self.matches_view.tree.rows + [
+                        self.new_standard_values(std, self.selected_standard[0])
+                        for std in self.match_ranking.next_page(MATCHES_PAGE_SIZE)],
+                    keep_position=True)
 
-            if len(self.matching_new_standards_tree.get_children()) == len(self.potential_new_standards):
-                self.show_more_matches_button.config(state="disabled")
+            if self.match_ranking.exhausted:
+                self.matches_view.show_more_button.config(state="disabled")
 
     def show_all_matches(self):
-        if self.matching_new_standards_tree and self.show_all_matches_button and self.show_more_matches_button:
-            for new_standard in self.potential_new_standards:
-                if self.selected_standard:
-                    self.matching_new_standards_tree.insert("", "end", values=(
-                        new_standard["id"], new_standard["text"], new_standard["level"],
-                        self.matches[self.selected_standard[0]].get(
-                            new_standard["id"], {}).get("weighted_similarity", 0)))
+        if self.matches_view and self.match_ranking is not None:
+            if self.selected_standard:
+                self.match_ranking.rest()
+                self.matches_view.tree.set_rows(
+                    [self.new_standard_values(std, self.selected_standard[0])
+                     for std in self.match_ranking.handed_out()], keep_position=True)
 
-            self.show_more_matches_button.config(state="disabled")
-            self.show_all_matches_button.config(state="disabled")
+            self.matches_view.set_paging_enabled(False)
 
     def show_popup(self, title, message):
         messagebox.showinfo(title, message)
@@ -912,7 +904,16 @@ class StandardsHelperApp:  # pylint: disable=R0902
         messagebox.showerror(title, message)
 
 
-root = tk.Tk()
-root.state("zoomed")
-app = StandardsHelperApp(root)
-root.mainloop()
+if __name__ == "__main__":
+    # The guard keeps the worker processes from opening their own windows
+    root = tk.Tk()
+    # The zoomed state only exists on Windows, X11 has an attribute instead
+    if sys.platform == "win32":
+        root.state("zoomed")
+    else:
+        try:
+            root.attributes("-zoomed", True)
+        except tk.TclError:
+            pass  # The window manager can not maximize it, so it keeps its size
+    app = StandardsHelperApp(root)
+    root.mainloop()
@@ -0,0 +1,137 @@
+"""Contains the batch mode that ranks the candidates of every worksheet
+without the app, writing them to a report as they are found."""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Optional, TextIO
+
+from standards.columns import StandardRows, StandardsTable
+from standards.corpus import CorpusIndex
+from standards.matching import rank_worksheet
+from standards.snapshots import load_snapshot
+from standards.workbooks import get_new_standards, read_original_workbook
+
+REPORT_FORMATS = ("csv", "jsonl")
+REPORT_FIELDS = ["worksheet", "id", "text", "rank", "new_id", "new_text", "new_level",
+                 "weighted_similarity", "cosine", "edit", "keyword_proportion"]
+# Original standards ranked by each task sent to the workers
+CHUNK_SIZE = 25
+
+# Corpus of the new standards, built once in every worker process
+_worker_new_standards = StandardsTable([])
+_worker_index: Optional[CorpusIndex] = None
+
+
+def _start_worker(new_standards: StandardsTable):
+    """Builds the corpus index of the new standards in a worker process."""
+    global _worker_new_standards, _worker_index  # pylint: disable=W0603
+    _worker_new_standards = new_standards
+    _worker_index = CorpusIndex(new_standards)
+
+
+def _rank_chunk(worksheet: str, original_standards: StandardRows, keywords: list[str],
+                k: int) -> list[dict[str, Any]]:
+    """Gets the report rows of the top k candidates of some original standards."""
+    assert _worker_index is not None
+    ranking = rank_worksheet(worksheet, original_standards, _worker_index, keywords,
+                             k=k, prune=True)
+    texts = {std["id"]: std["text"] for std in original_standards}
+
+    rows = []
+    for std_id in ranking.rows:
+        matches = ranking.top_matches(std_id, _worker_new_standards)
+        for rank, (new_id, match) in enumerate(matches.items(), start=1):
+            new_standard = _worker_new_standards.get(new_id)
+            assert new_standard is not None  # The matches come from the same table
+            rows.append({
+                "worksheet": worksheet, "id": std_id, "text": texts[std_id], "rank": rank,
+                "new_id": new_id, "new_text": new_standard["text"],
+                "new_level": new_standard["level"], **match})
+    return rows
+
+
+@dataclass
+class BatchOptions:
+    """How the candidates of a batch run are ranked and reported."""
+
+    k: int = 10
+    keywords: list[str] = field(default_factory=list)
+    # Worker processes, all cores by default
+    workers: Optional[int] = None
+    # Taken from the extension of the report when not given
+    report_format: Optional[str] = None
+
+
+class ReportWriter:
+    """CSV or JSON Lines file where every batch of rows is written and flushed
+    as soon as it arrives, so a stopped run keeps what it had found. The file
+    is open while the writer is used in a with statement."""
+
+    def __init__(self, path: str, report_format: Optional[str] = None):
+        self.report_format = report_format or os.path.splitext(path)[1].lstrip(".").lower()
+        if self.report_format not in REPORT_FORMATS:
+            raise ValueError(f"The report format must be one of {', '.join(REPORT_FORMATS)}.")
+
+        self.path = path
+        self.file: Optional[TextIO] = None
+        self.writer: Optional[csv.DictWriter] = None
+
+    def __enter__(self):
+        self.file = open(self.path, "w", encoding="utf-8", newline="")
+        if self.report_format == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=REPORT_FIELDS)
+            self.writer.writeheader()
+        return self
+
+    def __exit__(self, *_):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def write(self, rows: list[dict[str, Any]]):
+        assert self.file is not None, "The report is only written inside a with statement"
+        for row in rows:
+            if self.writer:
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+
+def run_batch(original_path: str, new_path: str, report_path: str,
+              options: Optional[BatchOptions] = None) -> int:
+    """Ranks the top k new standards of every original standard in the
+    configured worksheets of the workbook on a pool of processes, and writes
+    them to the report as each chunk finishes. Returns the amount of rows
+    written.
+    """
+    options = options or BatchOptions()
+    new_standards = get_new_standards(new_path)
+    # Only the configured worksheets present in the workbook are parsed
+    worksheets = {worksheet: [std for std in parsed["standards"] if std["text"]]
+                  for worksheet, parsed in load_snapshot(
+                      original_path, "original", read_original_workbook).items()}
+    total = sum(len(originals) for originals in worksheets.values())
+
+    written = 0
+    done = 0
+    with ReportWriter(report_path, options.report_format) as report, ProcessPoolExecutor(
+            max_workers=options.workers, initializer=_start_worker, initargs=(new_standards,)
+    ) as executor:
+        futures = {executor.submit(_rank_chunk, worksheet, originals[start:start + CHUNK_SIZE],
+                                   options.keywords, options.k):
+                   len(originals[start:start + CHUNK_SIZE])
+                   for worksheet, originals in worksheets.items()
+                   for start in range(0, len(originals), CHUNK_SIZE)}
+
+        for future in as_completed(futures):
+            rows = future.result()
+            report.write(rows)
+            written += len(rows)
+            done += futures[future]
+            print(f"Ranked {done} of {total} standards.")
+
+    return written
@@ -0,0 +1,115 @@
+"""Contains the on-disk cache of the similarity values."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+# Changing how a value is computed must change this version, so the values
+# computed by the previous versions are never read again
+EDIT_DISTANCE_VERSION = "edit-1"
+
+CACHE_FILE_NAME = ".standards_helper_cache.sqlite"
+MAX_ENTRIES = 2_000_000
+# Amount of parameters sent in each query, under the limit of SQLite
+QUERY_BATCH = 500
+# Entries read again within this time keep their last use, so most reads
+# write nothing back to the file
+REFRESH_INTERVAL_NS = 3600 * 10**9
+
+
+def similarity_key(version: str, text1: str, text2: str) -> bytes:
+    """Gets the key of the similarity between two texts for a scoring version."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (version, text1, text2):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+
+    return digest.digest()
+
+
+class SimilarityCache:
+    """SQLite file holding similarity values by the hash of the compared texts.
+
+    Reads refresh the last use of the entries they find when it is older than
+    `REFRESH_INTERVAL_NS`. The refreshes are written along with the next
+    values stored, or when the cache is closed, and the least recently used
+    entries are evicted once the cache grows past `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.touched: set[bytes] = set()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key BLOB PRIMARY KEY, value REAL NOT NULL, last_used INTEGER NOT NULL)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    @classmethod
+    def for_workbook(cls, workbook_path: str) -> Optional["SimilarityCache"]:
+        """Opens the cache kept in the folder of the workbook, so every draft
+        in the folder shares it. Returns None when it can not be opened."""
+        path = os.path.join(os.path.dirname(os.path.abspath(workbook_path)), CACHE_FILE_NAME)
+        try:
+            return cls(path)
+        except sqlite3.Error as ex:
+            print(f"The similarity cache could not be opened: {ex}")
+            return None
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, float]:
+        """Gets the cached values of the keys that are present."""
+        found: dict[bytes, float] = {}
+        stale = time.time_ns() - REFRESH_INTERVAL_NS
+        with self.lock:
+            for start in range(0, len(keys), QUERY_BATCH):
+                batch = keys[start:start + QUERY_BATCH]
+                for key, value, last_used in self.connection.execute(
+                        "SELECT key, value, last_used FROM scores WHERE key IN "
+                        f"({','.join('?' * len(batch))})", batch):
+                    found[key] = value
+                    if last_used < stale:
+                        self.touched.add(key)
+
+        return found
+
+    def _write_touched(self, now: int):
+        """Writes the last use of the entries read since the previous write.
+        The caller holds the lock and commits."""
+        if self.touched:
+            self.connection.executemany(
+                "UPDATE scores SET last_used = ? WHERE key = ?",
+                ((now, key) for key in self.touched))
+            self.touched.clear()
+
+    def put_many(self, items: Iterable[tuple[bytes, float]]):
+        """Stores the values, evicting the least recently used ones if needed."""
+        now = time.time_ns()
+        with self.lock:
+            self._write_touched(now)
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO scores (key, value, last_used) VALUES (?, ?, ?)",
+                ((key, value, now) for key, value in items))
+            self.size += self.connection.total_changes - before
+
+            if self.size > self.max_entries:
+                self.connection.execute(
+                    "DELETE FROM scores WHERE key IN "
+                    "(SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                    (self.size - self.max_entries,))
+                self.size = self.max_entries
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self._write_touched(time.time_ns())
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,160 @@
+"""Contains the columnar container of the standards read from a workbook.
+
+Every field of the standards is kept in its own column: the IDs as interned
+strings, the levels as codes of a few distinct values, the completed flags as
+bytes and the texts as one UTF-8 buffer with the offset of each text. The
+rows are handed out as views that read like the dicts the app always used.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterable, Iterator, Optional
+
+# Fields of every standard, in the order of the dicts they replace
+FIELDS = ("id", "text", "level", "completed")
+
+# Standards as the rest of the app reads them, the rows of a table or plain dicts
+StandardRows = Sequence[Mapping[str, Any]]
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TextColumn(Sequence):
+    """Texts stored as one UTF-8 buffer with the offset of each text. A text
+    is only decoded when it is read."""
+
+    def __init__(self, texts: Iterable[str]):
+        encoded = [text.encode("utf-8") for text in texts]
+        self.offsets = array("q", [0])
+        for text in encoded:
+            self.offsets.append(self.offsets[-1] + len(text))
+        self.buffer = b"".join(encoded)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("The text is out of the column.")
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+
+def standard_texts(standards: StandardRows) -> Sequence[str]:
+    """Gets the texts of the standards, read from the buffer of a table
+    without copying them."""
+    if isinstance(standards, StandardsTable):
+        return standards.texts
+    return [str(standard["text"]) for standard in standards]
+
+
+class StandardRecord(Mapping):
+    """Dict-like view of one standard of a table. Only the completed flag
+    can be changed."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "StandardsTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self.table.value(self.index, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key != "completed" or "completed" not in self.table.fields:
+            raise TypeError(f"The {key} of a loaded standard cannot be changed.")
+        self.table.completed[self.index] = bool(value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.fields)
+
+    def __len__(self) -> int:
+        return len(self.table.fields)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self):
+        # Sent to other processes as a plain dict, without the whole table
+        return dict, (dict(self),)
+
+
+class StandardsTable(Sequence):
+    """Standards of a worksheet stored by column, with an index from the ID to
+    the position of the first standard with it."""
+
+    def __init__(self, standards: Iterable[Mapping]):
+        standards = list(standards)
+        has_completed = bool(standards) and "completed" in standards[0]
+        self.fields = FIELDS if has_completed else FIELDS[:-1]
+
+        self.ids = [_intern(standard["id"]) for standard in standards]
+        level_codes: dict[Any, int] = {}
+        self.levels = array("H", (level_codes.setdefault(
+            standard["level"], len(level_codes)) for standard in standards))
+        self.level_values: list[Any] = list(level_codes)
+        self.completed = bytearray(bool(standard.get("completed")) for standard in standards)
+
+        self.texts = TextColumn(str(standard["text"]) for standard in standards)
+
+        self.positions: dict[Any, int] = {}
+        for i, std_id in enumerate(self.ids):
+            self.positions.setdefault(std_id, i)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [StandardRecord(self, i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("The standard is out of the table.")
+        return StandardRecord(self, index)
+
+    def __iter__(self) -> Iterator[StandardRecord]:
+        return (StandardRecord(self, i) for i in range(len(self)))
+
+    def value(self, index: int, key: str) -> Any:
+        """Gets a field of the standard at the index."""
+        if key == "id":
+            return self.ids[index]
+        if key == "text":
+            return self.texts[index]
+        if key == "level":
+            return self.level_values[self.levels[index]]
+        if key == "completed" and "completed" in self.fields:
+            return bool(self.completed[index])
+        raise KeyError(key)
+
+    def get(self, std_id: Any) -> Optional[StandardRecord]:
+        """Gets the first standard with the ID."""
+        index = self.positions.get(std_id)
+        return None if index is None else StandardRecord(self, index)
+
+    def completed_mask(self) -> Any:
+        """Gets a numpy view of the completed flags, shared with the table."""
+        import numpy as np  # pylint: disable=C0415
+
+        return np.frombuffer(self.completed, dtype=bool)
+
+    def records(self, indices: Optional[Iterable[int]] = None) -> list[StandardRecord]:
+        """Gets the standards at the positions, or every standard by default."""
+        if indices is None:
+            return list(self)
+        return [StandardRecord(self, int(i)) for i in indices]
+
+    def where(self, mask: Any) -> list[StandardRecord]:
+        """Gets the standards where a boolean mask, such as one made from
+        `completed_mask`, is true."""
+        import numpy as np  # pylint: disable=C0415
+
+        return self.records(np.flatnonzero(mask).tolist())
@@ -7,6 +7,19 @@ new_standards_file = "C:\\Users\\Gabo\\Downloads\\DraftUnifiedStandard_PlanningV
 
 original_standards_ws = ["RCS", "GRS", "RWS", "RMS", "RAS", "RDS"]
 
+# Backend used to open the standards in Excel, None uses the first one available
+excel_backend = None
+
+# Share of the good matches that the candidate search of large corpora must
+# find before the exact scoring, 1.0 scores every new standard
+lsh_recall = 0.95
+
+# Standards after the current one that are compared in the background
+prefetch_amount = 3
+
+# Whether the timing spans and counters are recorded from the start
+tracing_enabled = False
+
 
 def get_worksheet_index(worksheet_name: str) -> int:
     """Get the index of the worksheet."""
@@ -0,0 +1,380 @@
+"""Contains the index built over the whole Unified Standard corpus."""
+
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from standards.cache import EDIT_DISTANCE_VERSION, SimilarityCache, similarity_key
+from standards.columns import StandardRows, standard_texts
+from standards.keywords import KeywordIndex
+from standards.lsh import MinHashIndex
+from standards.normalize import NormalizedTexts
+from standards.tracing import count, span
+from standards.text_comparison import (edit_distance_compare, edit_distance_compare_many,
+                                       edit_distance_upper_bounds, similarity_weights,
+                                       weigh_similarities)
+
+if TYPE_CHECKING:  # The parallel scorer imports this module
+    from standards.parallel import ParallelScorer
+
+# Called with the amount of steps done and the total amount of steps
+ProgressCallback = Callable[[int, int], None]
+# Amount of lines scored between each progress report
+PROGRESS_STEP = 256
+
+# Lines scored between each raise of the pruning threshold
+PRUNING_STEP = 256
+# Margin kept when pruning so rounding never drops a value equal to the threshold
+PRUNING_MARGIN = 1e-9
+# Standards with the best cosine values that are always scored exactly, along
+# with the candidates of the MinHash index
+COSINE_CANDIDATES = 50
+# Standards scored between each partial result of `iter_compare`
+STREAM_CHUNK_SIZE = 256
+
+
+class CorpusIndex:
+    """TF-IDF index over every line of the new standards.
+
+    The TF-IDF weights are fitted once when the Unified Standard is loaded, so
+    a query only has to be tokenized, transformed and multiplied against the
+    line matrix.
+    """
+
+    def __init__(self, new_standards: StandardRows):
+        self.ids = [standard["id"] for standard in new_standards]
+        # Read from the buffer of a table when the keyword index needs them
+        self.texts = standard_texts(new_standards)
+        self.normalized = NormalizedTexts(self.texts)
+
+        # Every line of every standard is a row of the matrix. The offsets
+        # mark where the lines of each standard begin.
+        self.lines = self.normalized.lines
+        self.line_offsets = self.normalized.line_offsets
+        self.line_standards = self.normalized.line_standards
+        self.multiline = self.normalized.multiline
+
+        # Optional scorer, such as a process pool, that computes the edit
+        # distance values of every line instead of this process
+        self.line_scorer: Optional["ParallelScorer"] = None
+        # Optional on-disk cache of the edit distance values
+        self.edit_cache: Optional[SimilarityCache] = None
+        # Optional MinHash index that limits the exact scoring to likely matches
+        self.candidate_index: Optional[MinHashIndex] = None
+        # Keyword index, built the first time keywords are used
+        self.keyword_index: Optional[KeywordIndex] = None
+
+        # The token counts come from the normalized lines, so the corpus is
+        # tokenized only once and gets the same weights as a TfidfVectorizer
+        from sklearn.feature_extraction.text import TfidfTransformer  # pylint: disable=C0415
+        self.transformer = TfidfTransformer()
+        self.matrix = None
+        if self.normalized.vocabulary:  # Otherwise the corpus has no usable words
+            self.matrix = self.transformer.fit_transform(self.normalized.line_counts())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def keyword_proportions(self, keywords: list[str]) -> np.ndarray:
+        """Gets the proportion of the keywords present in each new standard."""
+        with span("corpus.keywords"):
+            if self.keyword_index is None:
+                self.keyword_index = KeywordIndex(self.texts)
+            return self.keyword_index.proportions(keywords)
+
+    def cosine_line_scores(self, text: str) -> np.ndarray:
+        """Gets the cosine similarity of the text against every line."""
+        if self.matrix is None:
+            return np.zeros(len(self.lines))
+
+        with span("corpus.cosine"):
+            query = self.transformer.transform(self.normalized.query_counts([text]))
+            return np.asarray((self.matrix @ query.T).todense()).ravel()
+
+    def cosine_line_matrix(self, texts: list[str]) -> np.ndarray:
+        """Gets the cosine similarity of every text against every line, with one
+        row per text.
+        """
+        if self.matrix is None:
+            return np.zeros((len(texts), len(self.lines)))
+
+        with span("corpus.cosine_matrix"):
+            queries = self.transformer.transform(self.normalized.query_counts(texts))
+            return np.asarray((queries @ self.matrix.T).todense())
+
+    def edit_line_scores(self, text: str, on_progress: Optional[ProgressCallback] = None,
+                         indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """Gets the edit distance similarity of the text against the lines at
+        the indices, or every line by default. The other lines are left as NaN.
+        Only the lines missing from the cache, if there is one, are scored.
+        """
+        if indices is None:
+            return self._cached_scores(text, None, on_progress)
+
+        scores = np.full(len(self.lines), np.nan)
+        scores[indices] = self._cached_scores(text, indices, on_progress)
+        return scores
+
+    def _cached_scores(self, text: str, indices: Optional[np.ndarray],
+                       on_progress: Optional[ProgressCallback]) -> np.ndarray:
+        if not self.edit_cache:
+            return self.score_lines(text, indices, on_progress)
+
+        if indices is None:
+            indices = np.arange(len(self.lines))
+        keys = [similarity_key(EDIT_DISTANCE_VERSION, text, self.lines[i]) for i in indices]
+        with span("cache.get_many"):
+            cached = self.edit_cache.get_many(keys)
+        count("cache.hits", len(cached))
+        count("cache.misses", len(keys) - len(cached))
+        scores = np.array([cached.get(key, np.nan) for key in keys], dtype=np.float64)
+
+        missing = np.flatnonzero(np.isnan(scores))
+        if len(missing):
+            scores[missing] = self.score_lines(text, indices[missing], on_progress)
+            self.edit_cache.put_many(zip([keys[i] for i in missing], scores[missing].tolist()))
+        elif on_progress:
+            on_progress(len(indices), len(indices))
+
+        return scores
+
+    def candidate_lines(self, text: str, cosine_lines: np.ndarray) -> Optional[np.ndarray]:
+        """Gets the lines of the standards worth scoring exactly: the candidates
+        of the MinHash index and the standards with the best cosine values.
+        Returns None when there is no index, so every line is scored.
+        """
+        if not self.candidate_index:
+            return None
+
+        with span("corpus.candidates"):
+            standards = np.zeros(len(self), dtype=bool)
+            standards[self.line_standards[self.candidate_index.candidate_lines(text)]] = True
+            cosine = np.maximum.reduceat(cosine_lines, self.line_offsets)
+            best = min(COSINE_CANDIDATES, len(self))
+            standards[np.argpartition(-cosine, best - 1)[:best]] = True
+
+        count("corpus.candidate_standards", int(standards.sum()))
+        return np.flatnonzero(standards[self.line_standards])
+
+    def score_lines(self, text: str, indices: Optional[np.ndarray] = None,
+                    on_progress: Optional[ProgressCallback] = None) -> np.ndarray:
+        """Computes the edit distance similarity of the text against the lines
+        at the indices, or every line by default.
+        """
+        positions = range(len(self.lines)) if indices is None else indices
+        count("corpus.edit_distances", len(positions))
+        with span("corpus.edit"):
+            if self.line_scorer:
+                return self.line_scorer.edit_line_scores(text, on_progress, indices)
+
+            scores = np.empty(len(positions), dtype=np.float64)
+            for start in range(0, len(positions), PROGRESS_STEP):
+                for i in range(start, min(start + PROGRESS_STEP, len(positions))):
+                    scores[i] = edit_distance_compare(text, self.lines[positions[i]])
+                if on_progress:
+                    on_progress(min(start + PROGRESS_STEP, len(positions)), len(positions))
+
+            return scores
+
+    def reduce_lines(self, cosine_lines: np.ndarray,
+                     edit_lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Reduces the line scores to one pair of scores per standard.
+
+        Follows `get_text_comparisons`: single line standards keep both
+        values, multi-line standards report the best value of either method.
+        The lines are taken from the last axis, so a matrix with one row per
+        query is reduced in a single pass. Edit values left as NaN by pruning
+        are ignored, and standards without any edit value stay as NaN.
+        """
+        if not len(self):
+            shape = cosine_lines.shape[:-1] + (0,)
+            return np.zeros(shape), np.zeros(shape)
+
+        cosine = np.maximum.reduceat(cosine_lines, self.line_offsets, axis=-1)
+        edit = np.fmax.reduceat(edit_lines, self.line_offsets, axis=-1)
+        best = np.maximum(cosine, edit)
+
+        return (np.where(self.multiline, best, cosine),
+                np.where(self.multiline, best, edit))
+
+    def pruned_edit_line_scores(self, text: str, cosine_lines: np.ndarray, k: int,
+                                keyword_proportion: Optional[np.ndarray] = None
+                                ) -> np.ndarray:
+        """Gets the edit distance similarity of the text against the lines that
+        can still place their standard among the k best weighted similarities.
+        The lines of every other standard are left as NaN.
+        """
+        with span("corpus.pruned_edit"):
+            return self._pruned_edit_line_scores(text, cosine_lines, k, keyword_proportion)
+
+    def _pruned_edit_line_scores(self, text: str, cosine_lines: np.ndarray, k: int,
+                                 keyword_proportion: Optional[np.ndarray]) -> np.ndarray:
+        k = max(k, 1)
+        edit_lines = self._seed_edit_lines(text, cosine_lines, k, keyword_proportion)
+
+        # The rest is scored by decreasing cosine value, and the threshold is
+        # raised after each step with the values found so far, so the lines
+        # of the last standards are mostly skipped.
+        rest = np.flatnonzero(np.isnan(edit_lines))
+        cosine = np.maximum.reduceat(cosine_lines, self.line_offsets)
+        rest = rest[np.argsort(-cosine[self.line_standards[rest]], kind="stable")]
+        threshold = -np.inf
+        for start in range(0, len(rest), PRUNING_STEP):
+            threshold = max(threshold, self._pruning_threshold(
+                cosine_lines, edit_lines, k, keyword_proportion))
+            step = rest[start:start + PRUNING_STEP]
+            edit_lines[step] = edit_distance_compare_many(
+                text, [self.lines[i] for i in step],
+                min_scores=self._min_edit_scores(
+                    threshold, cosine_lines, keyword_proportion)[step])
+
+        # Standards with skipped lines that stay under the threshold only have
+        # partial values, so they are dropped altogether.
+        weighted = weigh_similarities(*self.reduce_lines(cosine_lines, edit_lines),
+                                      keyword_proportion)
+        incomplete = np.logical_or.reduceat(np.isnan(edit_lines), self.line_offsets)
+        dropped = incomplete & ~(weighted >= threshold)
+        edit_lines[dropped[self.line_standards]] = np.nan
+
+        return edit_lines
+
+    def _seed_edit_lines(self, text: str, cosine_lines: np.ndarray, k: int,
+                         keyword_proportion: Optional[np.ndarray]) -> np.ndarray:
+        """Fully scores the k standards with the best upper bounds. The lowest
+        of their weighted similarities is a first floor for the final top k.
+        The lines of every other standard are left as NaN.
+        """
+        bound_lines = edit_distance_upper_bounds(text, self.lines)
+        bounds = weigh_similarities(*self.reduce_lines(cosine_lines, bound_lines),
+                                    keyword_proportion)
+        seeds = np.zeros(len(self), dtype=bool)
+        seeds[np.argpartition(-bounds, k - 1)[:k]] = True
+
+        edit_lines = np.full(len(self.lines), np.nan)
+        for i in np.flatnonzero(seeds[self.line_standards]):
+            edit_lines[i] = edit_distance_compare(text, self.lines[i])
+        return edit_lines
+
+    def _pruning_threshold(self, cosine_lines: np.ndarray, edit_lines: np.ndarray, k: int,
+                           keyword_proportion: Optional[np.ndarray]) -> float:
+        """Gets the lowest weighted similarity the k best standards can have.
+        The values of standards with skipped lines are never above their final
+        value, so the k-th best of them is a floor for the final top k.
+        """
+        weighted = weigh_similarities(*self.reduce_lines(cosine_lines, edit_lines),
+                                      keyword_proportion)
+        weighted = weighted[~np.isnan(weighted)]
+        return float(np.partition(weighted, -k)[-k]) - PRUNING_MARGIN
+
+    def _min_edit_scores(self, threshold: float, cosine_lines: np.ndarray,
+                         keyword_proportion: Optional[np.ndarray]) -> np.ndarray:
+        """Gets the edit value each line needs to lift its standard up to the
+        threshold. Multi-line standards whose cosine value already reaches it
+        need all of their lines, since any of them may give the final value.
+        """
+        cosine_weight, edit_weight, keyword_weight = similarity_weights(
+            keyword_proportion is not None)
+        line_keyword_part = np.zeros(len(self.lines)) if keyword_proportion is None else \
+            keyword_weight * keyword_proportion[self.line_standards]
+        standard_cosine = np.maximum.reduceat(cosine_lines, self.line_offsets)
+        reaches_threshold = (cosine_weight + edit_weight) * \
+            standard_cosine[self.line_standards] + line_keyword_part >= threshold
+
+        return np.where(
+            self.multiline[self.line_standards],
+            np.where(reaches_threshold, -np.inf,
+                     (threshold - line_keyword_part) / (cosine_weight + edit_weight)),
+            (threshold - cosine_weight * cosine_lines - line_keyword_part) / edit_weight)
+
+    def compare(self, text: str, k: Optional[int] = None,
+                keyword_proportion: Optional[np.ndarray] = None,
+                on_progress: Optional[ProgressCallback] = None
+                ) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the cosine and edit distance values of the text against every
+        new standard, in the same order as the standards given to the index.
+
+        When k is given, only the standards that can reach the k best weighted
+        similarities get their edit distance computed. Otherwise, with a
+        candidate index, only its candidates do. The edit value of the rest,
+        and the cosine value of the multi-line ones, are left as NaN.
+        """
+        cosine_lines = self.cosine_line_scores(text)
+        if k is None or k >= len(self):
+            edit_lines = self.edit_line_scores(
+                text, on_progress, self.candidate_lines(text, cosine_lines))
+        else:
+            edit_lines = self.pruned_edit_line_scores(
+                text, cosine_lines, k, keyword_proportion)
+
+        return self.reduce_lines(cosine_lines, edit_lines)
+
+    def iter_compare(self, text: str, chunk_size: int = STREAM_CHUNK_SIZE
+                     ) -> Iterator[Tuple[np.ndarray, np.ndarray, int, int]]:
+        """Yields the cosine and edit distance values of the text against every
+        new standard as the edit distance is computed, one chunk of standards
+        at a time, with the amount of standards done and the total.
+
+        The standards with the best cosine values are scored first, so the
+        first chunks already hold most of the best matches. The standards not
+        scored yet are left as NaN, and the last values are the same as `compare`.
+        With a parallel line scorer, the chunks are grown until they have enough
+        lines for its process pool.
+        """
+        cosine_lines = self.cosine_line_scores(text)
+        candidates = self.candidate_lines(text, cosine_lines)
+        if candidates is None:
+            standards = np.arange(len(self))
+        else:
+            standards = np.unique(self.line_standards[candidates])
+        if len(self):
+            cosine = np.maximum.reduceat(cosine_lines, self.line_offsets)
+            standards = standards[np.argsort(-cosine[standards], kind="stable")]
+
+        min_lines = self.line_scorer.min_parallel_lines \
+            if self.line_scorer and self.line_scorer.parallel else 0
+        line_counts = np.diff(np.append(self.line_offsets, len(self.lines)))
+        chunk_lines = np.cumsum(line_counts[standards])
+
+        edit_lines = np.full(len(self.lines), np.nan)
+        start = 0
+        while start < len(standards):
+            lines_before = chunk_lines[start - 1] if start else 0
+            end = min(len(standards), max(
+                start + chunk_size,
+                int(np.searchsorted(chunk_lines, lines_before + min_lines)) + 1))
+            if min_lines and chunk_lines[-1] - chunk_lines[end - 1] < min_lines:
+                end = len(standards)  # The rest is too small for the pool on its own
+
+            chunk = np.zeros(len(self), dtype=bool)
+            chunk[standards[start:end]] = True
+            lines = np.flatnonzero(chunk[self.line_standards])
+            edit_lines[lines] = self._cached_scores(text, lines, None)
+            start = end
+            yield (*self.reduce_lines(cosine_lines, edit_lines), end, len(standards))
+
+        if not len(standards):
+            yield (*self.reduce_lines(cosine_lines, edit_lines), 0, 0)
+
+    def compare_many(self, texts: list[str], k: Optional[int] = None,
+                     keyword_proportion: Optional[np.ndarray] = None,
+                     on_progress: Optional[ProgressCallback] = None
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the cosine and edit distance matrices of the texts against every
+        new standard, with one row per text and one column per new standard.
+        The pruning with k works the same as in `compare`, and the progress is
+        reported once per text.
+        """
+        cosine_lines = self.cosine_line_matrix(texts)
+        edit_lines = []
+        for i, text in enumerate(texts):
+            if k is None or k >= len(self):
+                edit_lines.append(self.edit_line_scores(
+                    text, indices=self.candidate_lines(text, cosine_lines[i])))
+            else:
+                edit_lines.append(self.pruned_edit_line_scores(
+                    text, cosine_lines[i], k, keyword_proportion))
+            if on_progress:
+                on_progress(i + 1, len(texts))
+
+        return self.reduce_lines(cosine_lines, np.array(
+            edit_lines, dtype=np.float64).reshape(len(texts), len(self.lines)))
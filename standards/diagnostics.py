@@ -0,0 +1,88 @@
+"""Contains the window that shows the recent timings of the app."""
+
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from typing import Optional
+
+from standards.tracing import tracer
+
+# Time between every refresh of the window
+REFRESH_INTERVAL_MS = 1000
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    """Window with the timing spans and counters recorded by the tracer,
+    refreshed while it is open."""
+
+    def __init__(self, master: tk.Misc):
+        super().__init__(master)
+        self.title("Diagnostics")
+        self.refresh_timer: Optional[str] = None
+
+        self.enabled = tk.IntVar(value=int(tracer.enabled))
+        tk.Checkbutton(self, text="Record timings", variable=self.enabled,
+                       command=self.toggle_tracing, font=("Calibri", 11)).pack(pady=5)
+
+        self.spans_tree = ttk.Treeview(
+            self, columns=("Span", "Count", "Last", "Mean", "Max", "Total"), show="headings",
+            height=12)
+        for column, width in (("Span", 260), ("Count", 70), ("Last", 90), ("Mean", 90),
+                              ("Max", 90), ("Total", 100)):
+            self.spans_tree.heading(column, text=column if column in ("Span", "Count")
+                                    else f"{column} (ms)")
+            self.spans_tree.column(column, width=width, stretch=tk.NO)
+        self.spans_tree.pack(padx=10, pady=5, fill="both", expand=True)
+
+        self.counters_tree = ttk.Treeview(
+            self, columns=("Counter", "Value"), show="headings", height=6)
+        self.counters_tree.heading("Counter", text="Counter")
+        self.counters_tree.heading("Value", text="Value")
+        self.counters_tree.column("Counter", width=500, stretch=tk.NO)
+        self.counters_tree.column("Value", width=200, stretch=tk.NO)
+        self.counters_tree.pack(padx=10, pady=5, fill="both", expand=True)
+
+        buttons_frame = tk.Frame(self)
+        buttons_frame.pack(pady=5)
+        tk.Button(buttons_frame, text="Export JSON", command=self.export, width=20,
+                  font=("Calibri", 11), bg="#b3e6ff").pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Reset", command=self.reset, width=20,
+                  font=("Calibri", 11), bg="#ff9999").pack(side=tk.LEFT, padx=5)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def toggle_tracing(self):
+        tracer.enabled = bool(self.enabled.get())
+
+    def refresh(self):
+        """Shows the latest statistics and schedules the next refresh."""
+        summary = tracer.summary()
+        self.spans_tree.delete(*self.spans_tree.get_children())
+        for name, stats in summary["spans"].items():
+            self.spans_tree.insert("", "end", values=(
+                name, stats["count"], f"{stats['last_ms']:.1f}", f"{stats['mean_ms']:.1f}",
+                f"{stats['max_ms']:.1f}", f"{stats['total_ms']:.1f}"))
+
+        self.counters_tree.delete(*self.counters_tree.get_children())
+        for name, value in summary["counters"].items():
+            self.counters_tree.insert("", "end", values=(name, value))
+
+        self.refresh_timer = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if path:
+            tracer.export_json(path)
+            messagebox.showinfo("Diagnostics", f"The timings were saved to {path}.", parent=self)
+
+    def reset(self):
+        tracer.reset()
+        if self.refresh_timer:
+            self.after_cancel(self.refresh_timer)
+        self.refresh()
+
+    def close(self):
+        if self.refresh_timer:
+            self.after_cancel(self.refresh_timer)
+        self.destroy()
@@ -0,0 +1,59 @@
+"""Contains the backends used to show a cell of a workbook in Excel."""
+
+import importlib.util
+from typing import Optional
+
+
+class ExcelBackend:
+    """Backend used when Excel can not be controlled. It does nothing, so the
+    app can tell the user where the cell is instead."""
+
+    name = "none"
+
+    def available(self) -> bool:
+        return True
+
+    def open_cell(self, workbook_path: str, worksheet: str, cell: str) -> bool:
+        """Opens the workbook and selects the cell. Returns False when the
+        backend can not do it."""
+        # pylint: disable=W0613
+        return False
+
+
+class Win32ExcelBackend(ExcelBackend):
+    """Backend that drives the Excel application through COM on Windows."""
+
+    name = "win32com"
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("win32com") is not None
+
+    def open_cell(self, workbook_path: str, worksheet: str, cell: str) -> bool:
+        # Only imported when a cell is opened, it is slow and Windows only
+        import win32com.client  # pylint: disable=C0415
+
+        excel = win32com.client.Dispatch("Excel.Application")
+        excel.Visible = True
+        workbook = excel.Workbooks.Open(workbook_path)
+        sheet = workbook.Worksheets(worksheet)
+        sheet.Activate()
+        sheet.Range(cell).Select()
+        return True
+
+
+# Backends by name, in the order they are tried when none is requested
+EXCEL_BACKENDS: dict[str, type[ExcelBackend]] = {
+    Win32ExcelBackend.name: Win32ExcelBackend,
+    ExcelBackend.name: ExcelBackend,
+}
+
+
+def get_excel_backend(name: Optional[str] = None) -> ExcelBackend:
+    """Gets the backend with the name, or the first available one. The no-op
+    backend is used when the requested one is not available."""
+    if name:
+        backend = EXCEL_BACKENDS.get(name, ExcelBackend)()
+        return backend if backend.available() else ExcelBackend()
+
+    return next(backend for backend in (cls() for cls in EXCEL_BACKENDS.values())
+                if backend.available())
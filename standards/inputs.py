@@ -1,4 +1,5 @@
 # Function to calculate the maximum similarity score for multiple lines of text
+import heapq
 from typing import Tuple
 
 from standards.text_comparison import (cosine_similarity_compare,
@@ -18,9 +19,8 @@ def show_matches(original_standard, matches, user_option, amount=10):
     if original_standard:
         print(f"Original standard: {original_standard['text']}")
     print(f"Top {amount} matches:")
-    for i, (std_id, match) in enumerate(sorted(matches[user_option].items(),
-                                               key=lambda x: x[1]["weighted_similarity"],
-                                               reverse=True)[:amount]):
+    for i, (std_id, match) in enumerate(heapq.nlargest(amount, matches[user_option].items(),
+                                                       key=lambda x: x[1]["weighted_similarity"])):
         print(f"{i+1}. {std_id}: {match}")
     print("\n")
 
@@ -0,0 +1,110 @@
+"""Contains the helpers to run long tasks off the Tk main thread."""
+
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """Task running on a background thread.
+
+    The task receives the job itself and should call `report` from time to
+    time, which publishes its progress and stops it once it is cancelled.
+    Partial results can be handed out the same way with `publish`.
+    """
+
+    def __init__(self, task: Callable[["Job"], Any]):
+        self.task = task
+        self.messages: queue.Queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        try:
+            result = self.task(self)
+        except JobCancelled:
+            return
+        except Exception as ex:  # pylint: disable=W0718
+            self.messages.put(("error", ex))
+            return
+        self.messages.put(("done", result))
+
+    def report(self, done: int, total: int):
+        """Publishes the progress of the job, as `done` out of `total` steps."""
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.messages.put(("progress", done / total if total else 1.0))
+
+    def publish(self, value: Any):
+        """Publishes a partial result of the job."""
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.messages.put(("partial", value))
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class JobRunner:
+    """Runs one job at a time and hands its messages back to the Tk thread
+    by polling with `master.after`. Submitting a new job cancels the current one.
+    """
+
+    def __init__(self, master, poll_interval: int = 50):
+        self.master = master
+        self.poll_interval = poll_interval
+        self.job: Optional[Job] = None
+        self.callbacks: dict[str, Callable] = {}
+
+    @property
+    def busy(self) -> bool:
+        return self.job is not None
+
+    def submit(self, task: Callable[[Job], Any], on_done: Callable[[Any], None],
+               on_progress: Optional[Callable[[float], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_partial: Optional[Callable[[Any], None]] = None) -> Job:
+        """Starts the task on a background thread, cancelling the current one."""
+        self.cancel()
+
+        self.job = Job(task)
+        self.callbacks = {"done": on_done}
+        if on_progress:
+            self.callbacks["progress"] = on_progress
+        if on_error:
+            self.callbacks["error"] = on_error
+        if on_partial:
+            self.callbacks["partial"] = on_partial
+
+        self.job.thread.start()
+        self.master.after(self.poll_interval, self.poll, self.job)
+        return self.job
+
+    def cancel(self):
+        """Cancels the current job, its results are never delivered."""
+        if self.job:
+            self.job.cancel()
+            self.job = None
+
+    def poll(self, job: Job):
+        if job is not self.job:  # The job was cancelled or replaced
+            return
+
+        while True:
+            try:
+                kind, value = job.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind in ("done", "error"):
+                self.job = None
+            if kind in self.callbacks:
+                self.callbacks[kind](value)
+            if kind in ("done", "error"):
+                return
+
+        self.master.after(self.poll_interval, self.poll, job)
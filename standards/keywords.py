@@ -0,0 +1,58 @@
+"""Contains the index that finds the new standards containing each keyword."""
+
+from typing import Any, Sequence
+
+import numpy as np
+
+from standards.search import ngrams
+
+
+class KeywordIndex:
+    """N-gram inverted index over the texts of the new standards that finds
+    the texts containing each keyword.
+
+    The n-grams of a keyword give a few candidates, which are then checked
+    with `keyword in text`, so the matching is still case sensitive and exact.
+    The texts containing every keyword are kept, since the same keywords are
+    used for every comparison until they change.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = texts
+        self.postings: dict[str, set[int]] = {}
+        for i, text in enumerate(texts):
+            for ngram in ngrams(text):
+                self.postings.setdefault(ngram, set()).add(i)
+        self.masks: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def matching(self, keyword: str) -> np.ndarray:
+        """Gets a mask of the texts that contain the keyword."""
+        mask = self.masks.get(keyword)
+        if mask is not None:
+            return mask
+
+        query = ngrams(keyword)
+        if query:
+            postings = sorted((self.postings.get(ngram, set()) for ngram in query), key=len)
+            candidates: Any = set.intersection(*postings)
+        else:  # Keywords shorter than an n-gram are looked for in every text
+            candidates = range(len(self.texts))
+
+        mask = np.zeros(len(self.texts), dtype=bool)
+        mask[[i for i in candidates if keyword in self.texts[i]]] = True
+        self.masks[keyword] = mask
+        return mask
+
+    def proportions(self, keywords: list[str]) -> np.ndarray:
+        """Gets the proportion of the keywords present in each of the texts.
+        Repeated keywords count every time, as they always did."""
+        if not keywords:
+            return np.zeros(len(self.texts))
+
+        present = np.zeros(len(self.texts), dtype=np.int64)
+        for keyword in keywords:
+            present += self.matching(keyword)
+        return present / len(keywords)
@@ -0,0 +1,131 @@
+"""Contains the MinHash index that finds the lines likely to match a text.
+
+Every line gets a MinHash signature over the character shingles of its
+normalized UTF-8 bytes, lowercase with collapsed whitespace, and the
+signatures are cut in bands. Two texts become candidates when all the values
+of any band are equal, which happens with a probability that grows quickly
+with the Jaccard similarity of their shingles.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from standards.normalize import collapse
+
+# Bytes in each shingle
+SHINGLE_SIZE = 5
+# Hash functions in every signature
+NUM_PERMUTATIONS = 128
+# Jaccard similarity of the pairs that must be found with the requested recall
+TARGET_SIMILARITY = 0.3
+# Below this amount of lines, scoring every line is already fast
+MIN_LSH_LINES = 2000
+# Shingles hashed at once, bounding the memory used while building
+HASH_BATCH = 1 << 16
+
+
+def rows_for_recall(recall: float, num_permutations: int = NUM_PERMUTATIONS,
+                    similarity: float = TARGET_SIMILARITY) -> int:
+    """Gets the most rows per band that still make a pair with the target
+    similarity a candidate with at least the given probability."""
+    for rows in range(num_permutations, 0, -1):
+        bands = num_permutations // rows
+        if 1 - (1 - similarity ** rows) ** bands >= recall:
+            return rows
+    return 1
+
+
+class MinHashIndex:
+    """LSH index over the MinHash signatures of the lines of a corpus. The
+    lines are given already collapsed, as by `NormalizedTexts.collapsed_lines`."""
+
+    def __init__(self, lines: list[str], recall: float, seed: int = 0,
+                 num_permutations: int = NUM_PERMUTATIONS):
+        # Multiply-shift hash functions, the high half of a * x + b
+        rng = np.random.default_rng(seed)
+        self.multipliers = rng.integers(0, 1 << 63, num_permutations, dtype=np.uint64) | \
+            np.uint64(1)
+        self.increments = rng.integers(0, 1 << 63, num_permutations, dtype=np.uint64)
+        self.rows = rows_for_recall(recall, num_permutations)
+        self.bands = num_permutations // self.rows
+        # Odd multipliers that mix the values of a band into a single key
+        self.band_mixers = rng.integers(0, 1 << 63, self.rows, dtype=np.uint64) | np.uint64(1)
+
+        # The keys of every band are sorted, so a query is a binary search
+        keys = self.band_keys(self.signatures(lines))
+        self.band_order = np.argsort(keys, axis=0, kind="stable")
+        self.sorted_keys = np.take_along_axis(keys, self.band_order, axis=0)
+
+    @classmethod
+    def for_corpus(cls, lines: list[str], recall: float) -> Optional["MinHashIndex"]:
+        """Builds the index when it is worth it: the recall asks for less than
+        every line and the corpus is large. Returns None otherwise."""
+        if recall >= 1 or len(lines) < MIN_LSH_LINES:
+            return None
+        return cls(lines, recall)
+
+    def shingles(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Gets the shingles of every collapsed text and the offset where each
+        text's shingles begin. Texts shorter than a shingle are padded with spaces."""
+        encoded = [text.encode("utf-8").ljust(SHINGLE_SIZE) for text in texts]
+        lengths = np.array([len(text) for text in encoded], dtype=np.int64)
+        starts: np.ndarray = np.cumsum(lengths) - lengths
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        shingles = np.zeros(len(data) - SHINGLE_SIZE + 1, dtype=np.uint64)
+        for i in range(SHINGLE_SIZE):
+            shingles = (shingles << np.uint64(8)) | data[i:len(data) - SHINGLE_SIZE + 1 + i]
+
+        # Drop the shingles that run into the next text
+        valid = np.ones(len(shingles), dtype=bool)
+        for i in range(1, SHINGLE_SIZE):
+            ends = starts + lengths - i
+            valid[ends[ends < len(shingles)]] = False
+        counts = lengths - SHINGLE_SIZE + 1
+        offsets: np.ndarray = np.cumsum(counts) - counts
+
+        return shingles[valid], offsets
+
+    def signatures(self, texts: list[str]) -> np.ndarray:
+        """Gets the MinHash signature of every text, one row per text."""
+        if not texts:
+            return np.zeros((0, len(self.multipliers)), dtype=np.uint64)
+
+        shingles, offsets = self.shingles(texts)
+        signatures = np.empty((len(texts), len(self.multipliers)), dtype=np.uint64)
+
+        # Whole texts are hashed together, in batches of about HASH_BATCH shingles
+        bounds = np.append(offsets, len(shingles))
+        first = 0
+        while first < len(texts):
+            last = int(np.searchsorted(bounds, bounds[first] + HASH_BATCH, side="right")) - 1
+            last = min(max(last, first + 1), len(texts))
+            batch = shingles[bounds[first]:bounds[last]]
+            hashes = np.multiply(self.multipliers[:, None], batch[None, :])
+            np.add(hashes, self.increments[:, None], out=hashes)
+            np.right_shift(hashes, np.uint64(32), out=hashes)
+            signatures[first:last] = np.minimum.reduceat(
+                hashes, offsets[first:last] - bounds[first], axis=1).T
+            first = last
+
+        return signatures
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Gets one key per band for every signature."""
+        bands = signatures[:, :self.bands * self.rows].reshape(-1, self.bands, self.rows)
+        # Overflow wraps around, which is all the mixing needs
+        with np.errstate(over="ignore"):
+            return (bands * self.band_mixers).sum(axis=2, dtype=np.uint64)
+
+    def candidate_lines(self, text: str) -> np.ndarray:
+        """Gets the sorted indices of the lines that share a band with the text."""
+        keys = self.band_keys(self.signatures([collapse(text)]))[0]
+        candidates = []
+        for band, key in enumerate(keys):
+            column = self.sorted_keys[:, band]
+            start, end = np.searchsorted(column, key), np.searchsorted(column, key, side="right")
+            candidates.append(self.band_order[start:end, band])
+
+        return np.unique(np.concatenate(candidates)) if candidates else \
+            np.zeros(0, dtype=np.int64)
@@ -0,0 +1,134 @@
+"""Contains the list of matches of the compared standard, shown below the
+standards of the current worksheet."""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Protocol
+
+from standards.widgets import VirtualTreeview
+
+
+class MatchesViewHost(Protocol):
+    """Parts of the app used by the list of matches and its buttons."""
+
+    master: tk.Tk
+    selected_new_standard: Any
+
+    def change_cursor(self, event: Any, button: tk.Button): ...
+
+    def add_placeholder(self, entry: tk.Entry, placeholder: str): ...
+
+    def debounce(self, key: str, callback: Callable[[], None]): ...
+
+    def filter_new_standards(self, criteria: str): ...
+
+    def on_matching_treeview_select(self, event: Any): ...
+
+    def process_next_standard(self): ...
+
+    def show_more_matches(self): ...
+
+    def show_all_matches(self): ...
+
+    def write_selected_new_standard(self): ...
+
+    def open_file(self, file_path: Any): ...
+
+    def reset_state(self): ...
+
+
+class MatchesView(tk.Frame):  # pylint: disable=R0901
+    """List of matches of the compared standard, with its filter and the
+    buttons to process the next standard, show more matches, write or open
+    the selected match and reset the app. Every widget is destroyed with it.
+    """
+
+    def __init__(self, host: MatchesViewHost, last_standard: bool):
+        super().__init__(host.master)
+        self.host = host
+        self.pack()
+
+        self.process_next_button = self.add_button(
+            self, "Process Next Standard (>>>)", host.process_next_standard, "#b3ffb3")
+        self.process_next_button.config(width=114)
+        self.process_next_button.pack(pady=5)
+        if last_standard:
+            self.process_next_button.config(state="disabled")
+
+        # Entry to allow filtering of new standards
+        filter_entry = tk.Entry(self, width=114, fg="gray", font=("Calibri", 11))
+        filter_entry.pack(pady=5)
+        filter_entry.bind("<KeyRelease>", lambda _: host.debounce(
+            "new", lambda: host.filter_new_standards(filter_entry.get())))
+        host.add_placeholder(filter_entry, "Enter the name of the criteria or its No.")
+
+        # Display the matching new standards in a Treeview
+        tree_frame = tk.Frame(self)
+        tree_frame.pack(pady=10)
+
+        self.tree = VirtualTreeview(
+            tree_frame, columns=("No.", "New Criteria", "Level", "Similarity"),
+            show="headings")
+        for column, width in (("No.", 50), ("New Criteria", 650), ("Level", 100),
+                              ("Similarity", 100)):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, stretch=tk.NO)
+        self.tree.column("#0", width=0, stretch=tk.NO)
+        self.tree.pack(in_=tree_frame, side="left", fill="both", expand=True)
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")
+        self.tree.set_scrollbar(scrollbar)
+        scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<ButtonRelease-1>", host.on_matching_treeview_select)
+
+        # Add two buttons side by side to show +10 more matches or to show all matches
+        more_matches_frame = tk.Frame(self)
+        more_matches_frame.pack(pady=5)
+
+        self.show_more_button = self.add_button(
+            more_matches_frame, "Show +10 More Matches", host.show_more_matches,
+            "#b3ffb3")
+        self.show_more_button.pack(side=tk.LEFT, padx=5)
+        self.show_all_button = self.add_button(
+            more_matches_frame, "Show All Matches", host.show_all_matches, "#b3e6ff")
+        self.show_all_button.pack(side=tk.LEFT, padx=5)
+
+        file_buttons_frame = tk.Frame(self)
+        file_buttons_frame.pack(pady=5)
+
+        # Button that writes the selected_new_standard to the Excel file
+        self.write_button = self.add_button(
+            file_buttons_frame, "Write Selected New Standard",
+            host.write_selected_new_standard, "#ff9999")
+        self.write_button.pack(side=tk.LEFT, padx=5)
+        self.write_button.config(state="disabled")
+
+        # Button that opens the selected_new_standard in Excel
+        self.open_button = self.add_button(
+            file_buttons_frame, "Open Selected New Standard in Excel",
+            lambda: host.open_file(host.selected_new_standard), "#b3e6ff")
+        self.open_button.pack(side=tk.LEFT, padx=5)
+        self.open_button.config(state="disabled")
+
+        # Button that resets the app without unloading the files
+        self.add_button(self, "Reset", host.reset_state, "#ff9999").pack(pady=5)
+
+    def add_button(self, parent: tk.Misc, text: str, command: Callable[[], Any],
+                   color: str) -> tk.Button:
+        """Creates a button that shows the hand cursor while hovered."""
+        button = tk.Button(parent, text=text, command=command, width=30,
+                           font=("Calibri", 11), bg=color)
+        button.bind("<Enter>", lambda event: self.host.change_cursor(event, button))
+        button.bind("<Leave>", lambda _: self.host.master.config(cursor=""))
+        return button
+
+    def set_selection_enabled(self, enabled: bool):
+        """Enables the buttons that act on the selected match."""
+        self.write_button.config(state="normal" if enabled else "disabled")
+        self.open_button.config(state="normal" if enabled else "disabled")
+
+    def set_paging_enabled(self, enabled: bool):
+        """Enables the buttons that show more matches."""
+        self.show_more_button.config(state="normal" if enabled else "disabled")
+        self.show_all_button.config(state="normal" if enabled else "disabled")
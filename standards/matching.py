@@ -0,0 +1,277 @@
+"""Contains the functions to rank the new standards against the original ones."""
+
+import heapq
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+import numpy as np
+
+from standards.columns import StandardRows
+from standards.corpus import CorpusIndex, ProgressCallback
+from standards.text_comparison import weigh_similarities
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Gets the indices of the k highest scores of each row, best first.
+    Only the selected candidates are sorted, the rest are partitioned out.
+    """
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), scores.shape[:-1] + (k,))
+
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1),
+                       axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def build_matches(new_standards: StandardRows, cosine: np.ndarray, edit: np.ndarray,
+                  keyword_proportion: Optional[np.ndarray] = None,
+                  indices: Optional[Any] = None) -> dict[str, dict]:
+    """Builds the matches dictionary shown in the app for the given standards.
+    The weighted similarity is given as a percentage.
+    """
+    weighted = weigh_similarities(cosine, edit, keyword_proportion)
+    if indices is None:
+        indices = range(len(new_standards))
+
+    matches = {}
+    for i in indices:
+        match = {
+            "weighted_similarity": round(100 * float(weighted[i]), 2),
+            "cosine": float(cosine[i]),
+            "edit": float(edit[i]),
+        }
+        if keyword_proportion is not None:
+            match["keyword_proportion"] = float(keyword_proportion[i])
+        matches[new_standards[i]["id"]] = match
+
+    return matches
+
+
+class WorksheetRanking:
+    """Similarity values of every original standard of a worksheet against
+    every new standard, with the best candidates of each row already selected.
+
+    The scores are the cosine and edit matrices, with one row per original
+    standard, and the keyword proportion of every new standard, if any. An
+    edit value left as NaN marks a standard that is not a candidate, as in
+    `CorpusIndex.compare`, unless the ranking was pruned to the top k.
+    """
+
+    def __init__(self, worksheet: str, original_ids: list[str],
+                 scores: tuple[np.ndarray, np.ndarray, Optional[np.ndarray]], k: int,
+                 pruned: bool = False):
+        self.worksheet = worksheet
+        self.rows = {std_id: i for i, std_id in enumerate(original_ids)}
+        self.cosine, self.edit, self.keyword_proportion = scores
+        self.pruned = pruned
+        weighted = weigh_similarities(*scores)
+        self.top = top_k(np.where(np.isnan(weighted), -np.inf, weighted), k)
+
+    def covers(self, std_id: str) -> bool:
+        """Checks if the ranking has the values of every candidate of the
+        standard. Pruned rankings only have the values of its top k."""
+        return not self.pruned and std_id in self.rows
+
+    def components(self, std_id: str) -> tuple:
+        """Gets the cosine, edit and keyword values of a standard's row."""
+        row = self.rows[std_id]
+        return self.cosine[row], self.edit[row], self.keyword_proportion
+
+    def top_matches(self, std_id: str, new_standards: StandardRows) -> dict[str, dict]:
+        """Gets the best candidates of a standard, best first."""
+        cosine, edit, keyword_proportion = self.components(std_id)
+        top = self.top[self.rows[std_id]]
+        # Rows with fewer than k candidates leave standards without values in the top
+        return build_matches(new_standards, cosine, edit, keyword_proportion,
+                             top[~np.isnan(edit[top])])
+
+
+def rank_worksheet(  # pylint: disable=R0913
+        worksheet: str, original_standards: StandardRows, index: CorpusIndex,
+        keywords: Optional[list[str]] = None, *, k: int = 10, prune: bool = False,
+        on_progress: Optional[ProgressCallback] = None) -> WorksheetRanking:
+    """Compares every original standard of a worksheet against every new
+    standard at once and selects the top k candidates of each one.
+    With `prune`, the edit distance is only computed for the candidates that
+    can reach the top k, and the rest of each row is left as NaN.
+    """
+    keywords = keywords or []
+    originals = [std for std in original_standards if std["text"]]
+
+    keyword_proportion = None
+    if keywords:
+        # The keywords are the same for every row, so a single row is shared
+        keyword_proportion = index.keyword_proportions(keywords)
+
+    cosine, edit = index.compare_many([str(std["text"]) for std in originals],
+                                      k if prune else None, keyword_proportion,
+                                      on_progress)
+
+    return WorksheetRanking(worksheet, [std["id"] for std in originals],
+                            (cosine, edit, keyword_proportion), k, prune)
+
+
+class StandardComparison:
+    """Cosine and edit distance values of an original standard against every
+    new standard. They do not depend on the keywords, so a change of keywords
+    only weighs them again.
+    """
+
+    def __init__(self, std_id: str, text: str, cosine: np.ndarray, edit: np.ndarray):
+        self.std_id = std_id
+        self.text = text
+        self.cosine = cosine
+        self.edit = edit
+
+    def covers(self, original_standard: Mapping[str, Any]) -> bool:
+        """Checks if the values belong to the standard as it is now."""
+        return self.std_id == original_standard["id"] and \
+            self.text == str(original_standard["text"])
+
+    def matches(self, new_standards: StandardRows, index: CorpusIndex,
+                keywords: Optional[list[str]] = None) -> dict[str, dict]:
+        """Gets the matches of the standard weighed with the keywords."""
+        keyword_proportion = index.keyword_proportions(keywords) if keywords else None
+
+        # Standards left out by the candidate index have no edit value
+        scored = np.flatnonzero(~np.isnan(self.edit))
+        return build_matches(new_standards, self.cosine, self.edit, keyword_proportion,
+                             scored if len(scored) < len(self.edit) else None)
+
+    def top_matches(self, new_standards: StandardRows, index: CorpusIndex,
+                    keywords: Optional[list[str]] = None, k: int = 10) -> dict[str, dict]:
+        """Gets the k best matches weighed with the keywords, best first.
+        Standards without an edit value are left out."""
+        keyword_proportion = index.keyword_proportions(keywords) if keywords else None
+        weighted = weigh_similarities(self.cosine, self.edit, keyword_proportion)
+        scored = ~np.isnan(weighted)
+        best = top_k(np.where(scored, weighted, -np.inf), k)
+        return build_matches(new_standards, self.cosine, self.edit, keyword_proportion,
+                             best[scored[best]])
+
+
+def score_standard(original_standard: Mapping[str, Any], index: CorpusIndex,
+                   ranking: Optional[WorksheetRanking] = None,
+                   on_progress: Optional[ProgressCallback] = None
+                   ) -> Optional[StandardComparison]:
+    """Gets the values of an original standard against every new standard.
+    They are read from the ranking when it already covers the standard.
+    """
+    if not original_standard["text"]:
+        return None
+
+    std_id = original_standard["id"]
+    if ranking and ranking.covers(std_id):
+        cosine, edit, _ = ranking.components(std_id)
+    else:
+        cosine, edit = index.compare(str(original_standard["text"]), on_progress=on_progress)
+    return StandardComparison(std_id, str(original_standard["text"]), cosine, edit)
+
+
+def stream_comparison(original_standard: Mapping[str, Any], new_standards: StandardRows,
+                      index: CorpusIndex, keywords: Optional[list[str]] = None, k: int = 10,
+                      ranking: Optional[WorksheetRanking] = None,
+                      on_progress: Optional[ProgressCallback] = None
+                      ) -> Iterator[tuple[StandardComparison, dict[str, dict]]]:
+    """Compares an original standard against the new standards one chunk at a
+    time, yielding the comparison so far and its k best matches after every
+    chunk. The last comparison is complete. Standards covered by the ranking
+    are yielded at once.
+    """
+    if not original_standard["text"]:
+        return
+
+    std_id, text = original_standard["id"], str(original_standard["text"])
+    if ranking and ranking.covers(std_id):
+        cosine, edit, _ = ranking.components(std_id)
+        steps: Any = [(cosine, edit, 1, 1)]
+    else:
+        steps = index.iter_compare(text)
+
+    for cosine, edit, done, total in steps:
+        if on_progress:
+            on_progress(done, total)
+        comparison = StandardComparison(std_id, text, cosine, edit)
+        yield comparison, comparison.top_matches(new_standards, index, keywords, k)
+
+
+def compare_standard(original_standard: Mapping[str, Any], new_standards: StandardRows,
+                     index: CorpusIndex, keywords: Optional[list[str]] = None,
+                     ranking: Optional[WorksheetRanking] = None,
+                     on_progress: Optional[ProgressCallback] = None) -> dict[str, dict]:
+    """Compares an original standard against every new standard."""
+    comparison = score_standard(original_standard, index, ranking, on_progress)
+    return comparison.matches(new_standards, index, keywords) if comparison else {}
+
+
+class MatchRanking:
+    """New standards present in the matches of a standard, handed out best
+    match first one page at a time.
+
+    The first page only keeps a bounded heap of the best candidates. The rest
+    is heapified once more pages are asked for, and every page then pops only
+    the standards it shows. The standards are ordered by decreasing weighted
+    similarity, and ties keep the order of the new standards.
+    """
+
+    def __init__(self, new_standards: StandardRows, matches: dict[str, dict]):
+        self.standards = [std for std in new_standards if std["id"] in matches]
+        self.positions = {std["id"]: i for i, std in enumerate(self.standards)}
+        # Ties keep the order of the new standards, as a stable sort would
+        self.keys = [(-matches[std["id"]].get("weighted_similarity", 0), i)
+                     for i, std in enumerate(self.standards)]
+        self.ranked: list[int] = []
+        self.heap: Optional[list[tuple[float, int]]] = None
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.standards)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.cursor >= len(self.standards)
+
+    def rank(self, count: int):
+        """Makes sure the best `count` standards are ranked."""
+        count = min(count, len(self.standards))
+        if count <= len(self.ranked):
+            return
+
+        if not self.ranked:
+            self.ranked = [i for _, i in heapq.nsmallest(count, self.keys)]
+            return
+
+        if self.heap is None:
+            # Every key is unique, so the first pops are the ones already ranked
+            self.heap = list(self.keys)
+            heapq.heapify(self.heap)
+            for _ in self.ranked:
+                heapq.heappop(self.heap)
+
+        while len(self.ranked) < count:
+            self.ranked.append(heapq.heappop(self.heap)[1])
+
+    def next_page(self, size: int) -> list[Mapping[str, Any]]:
+        """Gets the next `size` standards after the cursor and moves it."""
+        self.rank(self.cursor + size)
+        page = [self.standards[i] for i in self.ranked[self.cursor:self.cursor + size]]
+        self.cursor += len(page)
+        return page
+
+    def rest(self) -> list[Mapping[str, Any]]:
+        """Gets every standard after the cursor and moves it to the end."""
+        return self.next_page(len(self.standards) - self.cursor)
+
+    def handed_out(self) -> list[Mapping[str, Any]]:
+        """Gets the standards before the cursor, best first."""
+        return [self.standards[i] for i in self.ranked[:self.cursor]]
+
+    def order(self, standards: Iterable[Mapping[str, Any]]) -> list[Mapping[str, Any]]:
+        """Sorts some of the standards of the ranking, best match first."""
+        return sorted((std for std in standards if std["id"] in self.positions),
+                      key=lambda std: self.keys[self.positions[std["id"]]])
@@ -0,0 +1,87 @@
+"""Contains the normalized forms of the texts of the standards.
+
+They are computed once when the standards are loaded, so the scorers and the
+filters never have to lowercase, split or tokenize the same text again.
+"""
+
+import re
+from typing import Any, Iterable
+
+import numpy as np
+
+# Same tokens as the default of scikit-learn's TfidfVectorizer
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def collapse(text: str) -> str:
+    """Gets the lowercase text with every run of whitespace as a single space."""
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Gets the lowercase tokens of a text."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class NormalizedTexts:
+    """Lines and token ids of the texts of some standards.
+
+    Every line of every text is kept along with the offset where the lines of
+    each text begin. The texts themselves are not kept, so they can be read
+    one at a time from where they are stored. The tokens of the lines are
+    stored as ids of a vocabulary built from the same lines, all in a single array.
+    """
+
+    def __init__(self, texts: Iterable[str]):
+        self.lines: list[str] = []
+        offsets = []
+        for text in texts:
+            offsets.append(len(self.lines))
+            self.lines.extend(text.split("\n"))
+        self.line_offsets = np.array(offsets, dtype=np.int64)
+        line_counts = np.diff(np.append(self.line_offsets, len(self.lines)))
+        self.line_standards = np.repeat(np.arange(len(offsets)), line_counts)
+        self.multiline = line_counts > 1
+
+        self.vocabulary: dict[str, int] = {}
+        token_ids: list[int] = []
+        token_offsets = [0]
+        for line in self.lines:
+            token_ids.extend(self.vocabulary.setdefault(token, len(self.vocabulary))
+                             for token in tokenize(line))
+            token_offsets.append(len(token_ids))
+        self.token_ids = np.array(token_ids, dtype=np.int64)
+        self.token_offsets = np.array(token_offsets, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.line_offsets)
+
+    def collapsed_lines(self) -> list[str]:
+        """Gets the lines in lowercase with every run of whitespace as a single space."""
+        return [collapse(line) for line in self.lines]
+
+    def line_counts(self) -> Any:
+        """Gets the sparse matrix with the count of every token in every line."""
+        from scipy.sparse import csr_matrix  # pylint: disable=C0415
+
+        matrix = csr_matrix((np.ones(len(self.token_ids)), self.token_ids, self.token_offsets),
+                            shape=(len(self.lines), len(self.vocabulary)))
+        matrix.sum_duplicates()
+        return matrix
+
+    def query_counts(self, texts: list[str]) -> Any:
+        """Gets the sparse matrix with the count of every token of the
+        vocabulary in each of the texts. Tokens out of the vocabulary are left out."""
+        from scipy.sparse import csr_matrix  # pylint: disable=C0415
+
+        token_ids: list[int] = []
+        token_offsets = [0]
+        for text in texts:
+            token_ids.extend(self.vocabulary[token] for token in tokenize(text)
+                             if token in self.vocabulary)
+            token_offsets.append(len(token_ids))
+
+        matrix = csr_matrix((np.ones(len(token_ids)), token_ids, token_offsets),
+                            shape=(len(texts), len(self.vocabulary)))
+        matrix.sum_duplicates()
+        return matrix
@@ -0,0 +1,146 @@
+"""Contains the process pool used to score the corpus on every core."""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from standards.corpus import ProgressCallback
+from standards.text_comparison import edit_distance_compare
+
+# Below this amount of lines the pool costs more than it saves
+MIN_PARALLEL_LINES = 2000
+# Amount of chunks given to each worker, so the slow ones do not hold the rest
+CHUNKS_PER_WORKER = 4
+
+# Lines of the corpus, loaded once in every worker process
+_worker_lines: list[str] = []
+
+
+def _memory(block: shared_memory.SharedMemory) -> memoryview:
+    """Gets the memory of a shared block, which only goes away once it is closed."""
+    if block.buf is None:
+        raise ValueError(f"Shared memory {block.name} is closed.")
+    return block.buf
+
+
+def _attach_corpus(text_name: str, offsets_name: str, line_count: int):
+    """Reads the lines of the corpus from the shared memory blocks."""
+    text_block = shared_memory.SharedMemory(name=text_name)
+    offsets_block = shared_memory.SharedMemory(name=offsets_name)
+    try:
+        offsets = np.frombuffer(_memory(offsets_block), dtype=np.int64,
+                                count=line_count + 1).tolist()
+        data = bytes(_memory(text_block)[:offsets[-1]])
+        _worker_lines[:] = [data[offsets[i]:offsets[i + 1]].decode("utf-8")
+                            for i in range(line_count)]
+    finally:
+        text_block.close()
+        offsets_block.close()
+
+
+def _score_chunk(text: str, indices: range | np.ndarray) -> np.ndarray:
+    """Gets the edit distance similarity of the text against a chunk of lines."""
+    return np.array([edit_distance_compare(text, _worker_lines[i]) for i in indices],
+                    dtype=np.float64)
+
+
+class ParallelScorer:
+    """Scores the lines of a corpus on a pool of processes.
+
+    The lines are published once through shared memory when the pool starts,
+    so every task only sends the query and the range of lines to score. The
+    pool can be shared by jobs running on several threads.
+    """
+
+    def __init__(self, lines: list[str], workers: Optional[int] = None,
+                 min_parallel_lines: int = MIN_PARALLEL_LINES):
+        self.lines = lines
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.min_parallel_lines = min_parallel_lines
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.blocks: list[shared_memory.SharedMemory] = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 1 and len(self.lines) >= self.min_parallel_lines
+
+    def start(self) -> ProcessPoolExecutor:
+        """Publishes the corpus and starts the worker processes."""
+        with self.lock:
+            if not self.executor:
+                self.executor = self._start_pool()
+            return self.executor
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        encoded = [line.encode("utf-8") for line in self.lines]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in encoded], out=offsets[1:])
+
+        text_block = shared_memory.SharedMemory(create=True, size=max(1, int(offsets[-1])))
+        _memory(text_block)[:offsets[-1]] = b"".join(encoded)
+        offsets_block = shared_memory.SharedMemory(create=True, size=offsets.nbytes)
+        _memory(offsets_block)[:offsets.nbytes] = offsets.tobytes()
+        self.blocks = [text_block, offsets_block]
+
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_attach_corpus,
+            initargs=(text_block.name, offsets_block.name, len(encoded)))
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        with self.lock:
+            if self.executor:
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
+
+            for block in self.blocks:
+                block.close()
+                block.unlink()
+            self.blocks = []
+
+    def edit_line_scores(self, text: str, on_progress: Optional[ProgressCallback] = None,
+                         indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """Gets the edit distance similarity of the text against the lines at
+        the indices, or every line by default, with the same values as scoring
+        them in a single process.
+        """
+        positions = range(len(self.lines)) if indices is None else indices
+        if not self.parallel or len(positions) < self.min_parallel_lines:
+            scores = np.array([edit_distance_compare(text, self.lines[i]) for i in positions],
+                              dtype=np.float64)
+            if on_progress:
+                on_progress(len(positions), len(positions))
+            return scores
+
+        executor = self.start()
+        chunk_size = -(-len(positions) // (self.workers * CHUNKS_PER_WORKER))
+        futures = {executor.submit(_score_chunk, text, positions[start:start + chunk_size]):
+                   start for start in range(0, len(positions), chunk_size)}
+
+        scores = np.empty(len(positions), dtype=np.float64)
+        done = 0
+        try:
+            for future in as_completed(futures):
+                chunk = future.result()
+                scores[futures[future]:futures[future] + len(chunk)] = chunk
+                done += len(chunk)
+                if on_progress:
+                    on_progress(done, len(positions))
+        except BaseException:
+            # The comparison was cancelled or failed, the rest is not needed
+            for future in futures:
+                future.cancel()
+            raise
+
+        return scores
@@ -0,0 +1,114 @@
+"""Contains the comparisons of the next standards of the review queue,
+prepared in the background while the reviewer looks at the current one."""
+
+from collections import deque
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+import standards.config as cfg
+from standards.jobs import Job, JobRunner
+from standards.tracing import count, span
+
+# Prepares the comparison of an original standard on a job
+ComparisonTask = Callable[[Mapping[str, Any], Job], Any]
+
+
+def comparison_task(new_standards: Any, corpus_index: Any, keywords: list[str],
+                    ranking: Any = None, shown: Any = None, page_size: int = 10,
+                    stream: bool = False
+                    ) -> Callable[[Any, Optional[Mapping[str, Any]], Job], tuple]:
+    """Gets the task that compares an original standard on a job, given its ID
+    and the standard itself. With `stream`, the best `page_size` matches found
+    so far are published as they change.
+
+    The task works on the references it is given, so later changes to the
+    state of the app do not reach a running comparison.
+    """
+    keywords = list(keywords)
+
+    def compare(curr_std, original_standard, job):
+        # Imported by the job, so the first comparison does not block the window
+        from standards.matching import (  # pylint: disable=C0415
+            MatchRanking, score_standard, stream_comparison)
+
+        with span("app.comparison"):
+            # When only the keywords changed, the values shown are weighed again
+            scores = shown if shown and original_standard and \
+                shown.covers(original_standard) else None
+            if scores is None and original_standard and corpus_index and stream:
+                shown_top = None
+                for scores, top in stream_comparison(
+                        original_standard, new_standards, corpus_index, keywords,
+                        page_size, ranking, job.report):
+                    if top != shown_top:
+                        job.publish((curr_std, top))
+                        shown_top = top
+            elif scores is None and original_standard and corpus_index:
+                scores = score_standard(original_standard, corpus_index, ranking, job.report)
+            matches = {curr_std: scores.matches(new_standards, corpus_index, keywords)
+                       if scores and corpus_index else {}}
+            return curr_std, original_standard, matches, MatchRanking(
+                new_standards, matches[curr_std]), scores
+
+    return compare
+
+
+class Prefetcher:
+    """Compares the next standards of the review queue one at a time on its
+    own job runner, keeping the results by ID until they are taken.
+
+    The results hold the keywords they were weighed with, so they are dropped
+    whenever the queue or the keywords change.
+    """
+
+    def __init__(self, runner: JobRunner, amount: Optional[int] = None):
+        self.runner = runner
+        self.amount = cfg.prefetch_amount if amount is None else amount
+        self.pending: deque[Mapping[str, Any]] = deque()
+        self.results: dict[Any, Any] = {}
+        self.task: Optional[ComparisonTask] = None
+
+    def start(self, standards: Iterable[Mapping[str, Any]], task: ComparisonTask):
+        """Starts comparing the first standards that have no result yet. The
+        results of any other standard are dropped."""
+        self.runner.cancel()
+        upcoming = [standard for standard, _ in zip(standards, range(self.amount))]
+        ids = {standard["id"] for standard in upcoming}
+        self.results = {std_id: result for std_id, result in self.results.items()
+                        if std_id in ids}
+        self.pending = deque(standard for standard in upcoming
+                             if standard["id"] not in self.results)
+        self.task = task
+        self.run_next()
+
+    def run_next(self):
+        if not self.pending or self.task is None:
+            return
+
+        standard, task = self.pending[0], self.task
+        self.runner.submit(lambda job: task(standard, job), self.on_done,
+                           on_error=self.on_error)
+
+    def on_done(self, result: Any):
+        standard = self.pending.popleft()
+        self.results[standard["id"]] = result
+        self.run_next()
+
+    def on_error(self, _):
+        # The comparison fails again when the standard is shown, and reports it there
+        self.pending.clear()
+
+    def take(self, std_id: Any) -> Optional[Any]:
+        """Gets and forgets the result of the standard, if it is ready."""
+        result = self.results.pop(std_id, None)
+        count("review.prefetch_hits" if result is not None else "review.prefetch_misses")
+        return result
+
+    def pause(self):
+        """Stops the comparisons in progress and keeps the finished ones."""
+        self.runner.cancel()
+        self.pending.clear()
+
+    def clear(self):
+        """Stops the comparisons in progress and drops every result."""
+        self.pause()
+        self.results.clear()
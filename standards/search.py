@@ -0,0 +1,79 @@
+"""Contains the search index used by the criteria filter boxes."""
+
+from typing import Any, Mapping, Optional
+
+from standards.columns import StandardRows, standard_texts
+
+# Length of the character n-grams kept in the index
+NGRAM_SIZE = 3
+
+
+def matches_criteria(std_id: str, lower_id: str, lower_text: str, criteria: str) -> bool:
+    """Checks if a standard matches the criteria typed in a filter box."""
+    return std_id.startswith(criteria) or criteria in lower_id or \
+        lower_text.startswith(criteria.lower()) or criteria in lower_text
+
+
+def ngrams(text: str) -> set[str]:
+    """Gets the character n-grams of a text."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    """N-gram inverted index over the IDs and the lowercase texts of standards.
+
+    The n-grams of the query give a few candidates, which are then checked
+    with the same rules as the filter boxes always used. When the query only
+    adds characters to the end of the previous one, the previous results are
+    narrowed down instead.
+    """
+
+    def __init__(self, standards: StandardRows):
+        self.standards = standards
+        self.entries: list[Optional[tuple[str, str, str]]] = []
+        self.postings: dict[str, set[int]] = {}
+
+        for i, (standard, text) in enumerate(zip(standards, standard_texts(standards))):
+            if not (standard and text and standard["id"]):
+                self.entries.append(None)
+                continue
+
+            std_id = str(standard["id"])
+            lower_id = std_id.lower()
+            lower_text = text.lower()
+            self.entries.append((std_id, lower_id, lower_text))
+            for ngram in ngrams(lower_id) | ngrams(lower_text):
+                self.postings.setdefault(ngram, set()).add(i)
+
+        self.last_criteria: Optional[str] = None
+        self.last_result: list[int] = []
+
+    def candidates(self, criteria: str) -> Any:
+        """Gets the positions of the standards that may match the criteria."""
+        if self.last_criteria is not None and criteria.startswith(self.last_criteria):
+            return self.last_result
+
+        query = ngrams(criteria.lower())
+        if not query:
+            return range(len(self.standards))
+
+        postings = sorted((self.postings.get(ngram, set()) for ngram in query), key=len)
+        return sorted(set.intersection(*postings))
+
+    def search(self, criteria: str) -> list[Mapping[str, Any]]:
+        """Gets the standards that match the criteria, in their original order."""
+        if criteria == "":
+            self.last_criteria, self.last_result = None, []
+            return list(self.standards)
+
+        result = []
+        for i in self.candidates(criteria):
+            entry = self.entries[i]
+            if entry is None:
+                continue
+            std_id, lower_id, lower_text = entry
+            if matches_criteria(std_id, lower_id, lower_text, criteria):
+                result.append(i)
+
+        self.last_criteria, self.last_result = criteria, result
+        return [self.standards[i] for i in result]
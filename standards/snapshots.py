@@ -0,0 +1,104 @@
+"""Contains the snapshots of the parsed workbooks, reused while the files
+do not change."""
+
+import hashlib
+import marshal
+import os
+from typing import Any, Callable, Optional
+
+from standards.tracing import count
+
+# Changing what is stored in the snapshots must change this version
+SNAPSHOT_VERSION = 2
+
+# Snapshots already loaded in this session, by path and kind of parsing
+_loaded: dict[tuple[str, str], tuple[tuple[int, int], Any]] = {}
+
+
+def file_digest(path: str) -> str:
+    """Gets the SHA-256 hash of the content of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path(path: str, kind: str) -> str:
+    """Gets the path of the snapshot file kept next to the workbook."""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.{kind}.snapshot")
+
+
+def _read_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as file:
+            snapshot = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path: str, snapshot: dict):
+    temporary_path = f"{path}.tmp"
+    try:
+        with open(temporary_path, "wb") as file:
+            marshal.dump(snapshot, file)
+        os.replace(temporary_path, path)
+    except (OSError, ValueError) as ex:
+        print(f"The snapshot of the workbook could not be saved: {ex}")
+
+
+def load_snapshot(path: str, kind: str, parse: Callable[[str], Any]) -> Any:
+    """Gets the parsed content of a workbook, parsing it only when there is no
+    snapshot of the same file.
+
+    A file is the same when its path, size and modification time match.
+    When only the modification time changed, the hash of the content decides.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stat_key = (stat.st_size, stat.st_mtime_ns)
+
+    loaded = _loaded.get((path, kind))
+    if loaded and loaded[0] == stat_key:
+        count("snapshots.memory_hits")
+        return loaded[1]
+
+    snapshot_file = snapshot_path(path, kind)
+    snapshot = _read_snapshot(snapshot_file)
+    if not snapshot or snapshot["size"] != stat.st_size or \
+            snapshot["mtime"] != stat.st_mtime_ns:
+        digest = file_digest(path)
+        if not snapshot or snapshot["size"] != stat.st_size or snapshot["digest"] != digest:
+            count("snapshots.parses")
+            snapshot = {"version": SNAPSHOT_VERSION, "digest": digest, "data": parse(path)}
+        snapshot.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        _write_snapshot(snapshot_file, snapshot)
+
+    _loaded[(path, kind)] = (stat_key, snapshot["data"])
+    return snapshot["data"]
+
+
+def current_snapshot(path: str, kind: str) -> Optional[Any]:
+    """Gets the snapshot loaded in memory, if the file has not changed since."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    loaded = _loaded.get((path, kind))
+    if loaded and loaded[0] == (stat.st_size, stat.st_mtime_ns):
+        return loaded[1]
+    return None
+
+
+def replace_snapshot(path: str, kind: str, data: Any):
+    """Stores the data as the snapshot of the file as it is now. Used after the
+    app changes the file itself and already knows the new content."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    _loaded[(path, kind)] = ((stat.st_size, stat.st_mtime_ns), data)
+    _write_snapshot(snapshot_path(path, kind), {
+        "version": SNAPSHOT_VERSION, "digest": file_digest(path),
+        "size": stat.st_size, "mtime": stat.st_mtime_ns, "data": data})
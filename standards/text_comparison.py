@@ -1,12 +1,24 @@
 """Contains the functions to get the similarity among two different strings."""
 
+from typing import Optional, Tuple, Union
+
 import editdistance
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+
+from standards.tracing import count, traced
+
+# Weights of the cosine, edit distance and keyword values in the weighted similarity
+SIMILARITY_WEIGHTS = (0.5, 0.5, 0.0)
+KEYWORD_SIMILARITY_WEIGHTS = (0.3, 0.3, 0.4)
 
 
+@traced("text_comparison.cosine_similarity_compare")
 def cosine_similarity_compare(text1: str, text2: str) -> float:
     """Compares two different strings using the cosine similarity method."""
+    # scikit-learn is slow to import, so it is only loaded when first needed
+    from sklearn.feature_extraction.text import TfidfVectorizer  # pylint: disable=C0415
+    from sklearn.metrics.pairwise import cosine_similarity  # pylint: disable=C0415
+
     tfidf_vectorizer = TfidfVectorizer()  # Create the TF-IDF vectorizer
     # Fit and transform the texts
     tfidf_matrix = tfidf_vectorizer.fit_transform([text1, text2])
@@ -22,3 +34,59 @@ def edit_distance_compare(text1: str, text2: str) -> float:
     max_length = max(len(text1), len(text2))
 
     return 1 - edit_dist / max_length
+
+
+def edit_distance_upper_bounds(text: str, candidates: list[str]) -> np.ndarray:
+    """Gets the highest edit distance similarity each candidate could reach.
+    The edit distance is never lower than the difference between the lengths.
+    """
+    lengths = np.fromiter((len(candidate) for candidate in candidates),
+                          dtype=np.float64, count=len(candidates))
+    max_lengths = np.maximum(lengths, len(text))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bounds = 1 - np.abs(lengths - len(text)) / max_lengths
+
+    return np.where(max_lengths > 0, bounds, 1.0)
+
+
+def edit_distance_compare_many(text: str, candidates: list[str],
+                               min_scores: Union[float, np.ndarray, None] = None
+                               ) -> np.ndarray:
+    """Compares one string against many candidates using the edit distance method.
+
+    Candidates whose length alone keeps them under `min_scores` are skipped
+    and left as NaN. Every other value is the same as `edit_distance_compare`.
+    """
+    scores = np.full(len(candidates), np.nan)
+    computed = np.arange(len(candidates))
+    if min_scores is not None:
+        computed = np.flatnonzero(edit_distance_upper_bounds(text, candidates) >= min_scores)
+
+    # editdistance.distance_le_than is not used to reject the rest early:
+    # it is a banded computation that is slower than the bit-parallel
+    # `eval` for all but the tightest bounds, and the candidates it lets
+    # through still need `eval` for their value
+    for i in computed:
+        scores[i] = edit_distance_compare(text, candidates[i])
+
+    count("text_comparison.edit_distances", len(computed))
+    count("text_comparison.edit_distances_skipped", len(candidates) - len(computed))
+    return scores
+
+
+def similarity_weights(with_keywords: bool) -> Tuple[float, float, float]:
+    """Gets the weights of the cosine, edit distance and keyword values."""
+    return KEYWORD_SIMILARITY_WEIGHTS if with_keywords else SIMILARITY_WEIGHTS
+
+
+def weigh_similarities(cosine: np.ndarray, edit: np.ndarray,
+                       keyword_proportion: Optional[np.ndarray] = None) -> np.ndarray:
+    """Combines the similarity values into the weighted similarity.
+    The keywords take 40% of the weight when they are given.
+    """
+    if keyword_proportion is None:
+        cosine_weight, edit_weight, _ = SIMILARITY_WEIGHTS
+        return cosine * cosine_weight + edit * edit_weight
+
+    cosine_weight, edit_weight, keyword_weight = KEYWORD_SIMILARITY_WEIGHTS
+    return cosine * cosine_weight + edit * edit_weight + keyword_proportion * keyword_weight
@@ -0,0 +1,142 @@
+"""Contains the timing spans and counters kept around the slow parts of the app.
+
+Tracing is off by default. While it is off, `span` hands out a shared object
+that does nothing and `count` returns at once, so the instrumented code pays
+a single attribute check.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional, TypeVar
+
+import standards.config as cfg
+
+# Amount of finished spans kept for the recent latencies
+MAX_RECENT_SPANS = 500
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _NullSpan:
+    """Span used while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span that records its duration in the tracer when it ends."""
+
+    def __init__(self, owner: "Tracer", name: str):
+        self.tracer = owner
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """Durations of the named spans and values of the named counters."""
+
+    def __init__(self, enabled: bool = False, max_recent: int = MAX_RECENT_SPANS):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.recent: deque[tuple[float, str, float]] = deque(maxlen=max_recent)
+        # Amount, total, maximum and last duration of every span, by name
+        self.spans: dict[str, list[float]] = {}
+        self.counters: dict[str, int] = {}
+
+    def span(self, name: str) -> Any:
+        """Gets a context manager that times its block under the name."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, elapsed: float):
+        with self.lock:
+            self.recent.append((time.time(), name, elapsed))
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, elapsed, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+                stats[3] = elapsed
+
+    def count(self, name: str, amount: int = 1):
+        """Adds the amount to the counter with the name."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        with self.lock:
+            self.recent.clear()
+            self.spans.clear()
+            self.counters.clear()
+
+    def summary(self) -> dict[str, Any]:
+        """Gets the statistics of every span, in milliseconds, and the counters."""
+        with self.lock:
+            return {
+                "spans": {name: {"count": int(calls), "total_ms": 1000 * total,
+                                 "mean_ms": 1000 * total / calls, "max_ms": 1000 * longest,
+                                 "last_ms": 1000 * last}
+                          for name, (calls, total, longest, last) in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "recent": [{"time": at, "name": name, "ms": 1000 * elapsed}
+                           for at, name, elapsed in self.recent],
+            }
+
+    def export_json(self, path: str):
+        """Writes the summary to a JSON file."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+tracer = Tracer(enabled=cfg.tracing_enabled)
+
+
+def span(name: str) -> Any:
+    """Times a block under the name, see `Tracer.span`."""
+    return tracer.span(name)
+
+
+def count(name: str, amount: int = 1):
+    """Adds to a counter, see `Tracer.count`."""
+    tracer.count(name, amount)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator that times every call of a function under the name, or
+    under the name of the function by default."""
+    def decorator(function: F) -> F:
+        span_name = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with _Span(tracer, span_name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,175 @@
+"""Contains the widgets shared by the windows of the app."""
+
+from tkinter import ttk
+from typing import Any, Optional, Sequence
+
+from standards.tracing import traced
+
+# Rows moved by every step of the mouse wheel
+WHEEL_STEP = 3
+
+
+class VirtualTreeview(ttk.Treeview):
+    """Treeview that only holds an item for each row it can show at once.
+
+    The rows live in a list and scrolling writes the values of the rows that
+    come into view into those same items, so filling or scrolling the list
+    costs the same with ten rows as with ten thousand. The rows are addressed
+    by their index in the list or by the value of their `key_column`, never by
+    the item that shows them.
+    """
+
+    def __init__(self, master: Any, key_column: int = 0, **kwargs: Any):
+        super().__init__(master, **kwargs)
+        self.key_column = key_column
+        self.rows: list[Sequence] = []
+        self.row_indexes: dict[Any, int] = {}
+        self.offset = 0
+        self.selected: Optional[int] = None
+        self.scrollbar: Optional[ttk.Scrollbar] = None
+
+        self.bind("<<TreeviewSelect>>", self.on_select)
+        self.bind("<MouseWheel>", lambda event: self.scroll_rows(
+            -WHEEL_STEP if event.delta > 0 else WHEEL_STEP))
+        self.bind("<Button-4>", lambda _: self.scroll_rows(-WHEEL_STEP))
+        self.bind("<Button-5>", lambda _: self.scroll_rows(WHEEL_STEP))
+        self.bind("<Up>", lambda _: self.move_selection(-1))
+        self.bind("<Down>", lambda _: self.move_selection(1))
+        self.bind("<Prior>", lambda _: self.move_selection(-self.page_size))
+        self.bind("<Next>", lambda _: self.move_selection(self.page_size))
+
+    @property
+    def page_size(self) -> int:
+        return max(1, int(self.cget("height")))
+
+    def set_scrollbar(self, scrollbar: ttk.Scrollbar):
+        """Connects a vertical scrollbar, which moves through every row."""
+        self.scrollbar = scrollbar
+        scrollbar.configure(command=self.yview)
+        self.update_scrollbar()
+
+    @traced("ui.set_rows")
+    def set_rows(self, rows: Sequence[Sequence], keep_position: bool = False):
+        """Replaces the rows of the list, going back to the top and clearing the
+        selection unless `keep_position` is set. A kept selection follows the
+        key of its row."""
+        selected_key = self.rows[self.selected][self.key_column] \
+            if keep_position and self.selected is not None else None
+        self.rows = list(rows)
+        self.row_indexes = {row[self.key_column]: i for i, row in enumerate(self.rows)}
+        if not keep_position:
+            self.offset = 0
+            self.selected = None
+        elif self.selected is not None:
+            self.selected = self.row_indexes.get(selected_key)
+
+        slots = min(self.page_size, len(self.rows))
+        items = self.get_children()
+        if len(items) > slots:
+            self.delete(*items[slots:])
+        for slot in range(len(items), slots):
+            self.insert("", "end", iid=str(slot))
+
+        self.scroll_to(self.offset)
+
+    def scroll_to(self, offset: int):
+        """Shows the rows from the one at `offset` on."""
+        self.offset = max(0, min(offset, len(self.rows) - self.page_size))
+        for slot, item in enumerate(self.get_children()):
+            self.item(item, values=tuple(self.rows[self.offset + slot]))
+
+        self.show_selection()
+        self.update_scrollbar()
+
+    def update_row(self, key: Any, values: Sequence) -> bool:
+        """Replaces the values of the row with the key, redrawing only its item
+        if it is in view. Returns False when no row has the key."""
+        index = self.row_indexes.get(key)
+        if index is None:
+            return False
+
+        self.rows[index] = values
+        slot = index - self.offset
+        items = self.get_children()
+        if 0 <= slot < len(items):
+            self.item(items[slot], values=tuple(values))
+        return True
+
+    def scroll_rows(self, amount: int) -> str:
+        self.scroll_to(self.offset + amount)
+        return "break"
+
+    def yview(self, *args: Any) -> Any:
+        """Scrolls through the rows as the scrollbar asks, with the same
+        arguments as `ttk.Treeview.yview`."""
+        if not args:
+            return self.visible_fraction()
+
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll_rows(amount * self.page_size if args[2] == "pages" else amount)
+        return None
+
+    def visible_fraction(self) -> tuple[float, float]:
+        if not self.rows:
+            return 0.0, 1.0
+        last = min(self.offset + self.page_size, len(self.rows))
+        return self.offset / len(self.rows), last / len(self.rows)
+
+    def update_scrollbar(self):
+        if self.scrollbar:
+            self.scrollbar.set(*self.visible_fraction())
+
+    def show_selection(self):
+        """Selects the item that shows the selected row, if it is in view."""
+        items = self.get_children()
+        slot = None if self.selected is None else self.selected - self.offset
+        if slot is not None and 0 <= slot < len(items):
+            if self.selection() != (items[slot],):
+                self.selection_set(items[slot])
+        elif self.selection():
+            self.selection_set(())
+
+    def on_select(self, _: Any):
+        selection = self.selection()
+        if selection:
+            self.selected = self.offset + self.index(selection[0])
+
+    def select(self, index: int):
+        """Selects a row, scrolling until it is in view."""
+        if not 0 <= index < len(self.rows):
+            return
+
+        self.selected = index
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.page_size:
+            self.scroll_to(index - self.page_size + 1)
+        else:
+            self.show_selection()
+
+    def move_selection(self, amount: int) -> str:
+        start = self.selected_index()
+        self.select(0 if start is None else max(0, min(start + amount, len(self.rows) - 1)))
+        return "break"
+
+    def selected_index(self) -> Optional[int]:
+        """Gets the index of the selected row."""
+        selection = self.selection()
+        if selection:
+            return self.offset + self.index(selection[0])
+        return self.selected
+
+    def selected_values(self) -> Optional[list]:
+        """Gets the values of the selected row."""
+        index = self.selected_index()
+        return None if index is None else list(self.rows[index])
+
+    def delete_row(self, index: int):
+        """Removes a row, keeping the view where it was."""
+        del self.rows[index]
+        if self.selected is not None and self.selected >= index:
+            self.selected = None if self.selected == index else self.selected - 1
+        self.set_rows(self.rows, keep_position=True)
@@ -1,11 +1,14 @@
 """Module with the functions to work with the worksheets."""
 
+import os
 import re
-from typing import Any, Union
-
-from openpyxl import load_workbook
+from typing import Any, Iterable, Optional, Union
 
 import standards.config as cfg
+from standards.columns import StandardsTable
+from standards.snapshots import current_snapshot, load_snapshot, replace_snapshot
+from standards.tracing import span, traced
+from standards.xlsx import iter_rows, open_workbook
 
 
 def is_standard_compared(standard: Any) -> bool:
@@ -15,20 +18,20 @@ def is_standard_compared(standard: Any) -> bool:
     return standard[4] is not None and standard[5] is not None and standard[6] is not None
 
 
-def get_original_standards(path: str, worksheet: str) -> list[dict[str, Union[str, None]]]:
-    """Gets the list with the original standards."""
-    original_workbook = load_workbook(path)
-    original_worksheet = original_workbook[cfg.original_standards_ws[cfg.get_worksheet_index(
-        worksheet)]]
-    original_rows = original_worksheet.iter_rows(
-        min_row=4, min_col=2, max_col=8, values_only=True)
-
+def parse_original_standards(rows: Iterable[tuple]) -> dict[str, Any]:
+    """Gets the original standards from the rows of a worksheet, read from
+    column B to H, with the row of each standard and the first row of every
+    value in column B."""
     original_standards: list[dict[str, Union[str, None]]] = []
-    for row in original_rows:
+    standard_rows: list[int] = []
+    id_rows: dict[Any, int] = {}
+    for row_number, row in rows:
+        if row[0] is not None:
+            id_rows.setdefault(row[0], row_number)
+
         if row[0]:
             matches = re.match(
                 r"^[A-Za-z]+[0-9]*(\.[0-9]+)*[a-z]*\.?[a-z]*$", row[0].strip())
-            print("Row: ", row[0], "Match: ", matches)
 
         if row[0] and row[1] and row[0] != "No." and matches:
             standard = {
@@ -38,19 +41,67 @@ def get_original_standards(path: str, worksheet: str) -> list[dict[str, Union[st
                 "completed": is_standard_compared(row)
             }
             original_standards.append(standard)
+            standard_rows.append(row_number)
+
+    return {"standards": original_standards, "standard_rows": standard_rows, "rows": id_rows}
+
+
+@traced("workbooks.read_original")
+def read_original_workbook(path: str) -> dict[str, dict[str, Any]]:
+    """Gets the original standards of every worksheet in the workbook."""
+    with open_workbook(path) as reader:
+        sheet_names = reader.sheet_names()
+        return {worksheet: parse_original_standards(
+            reader.iter_rows(worksheet, min_row=4, min_col=2, max_col=8))
+            for worksheet in cfg.original_standards_ws if worksheet in sheet_names}
+
+
+def get_original_standards(path: str, worksheet: str) -> StandardsTable:
+    """Gets the table with the original standards.
+    The workbook is only parsed again when the file changes."""
+    worksheets = load_snapshot(path, "original", read_original_workbook)
+    original_standards = worksheets[cfg.original_standards_ws[cfg.get_worksheet_index(
+        worksheet)]]["standards"]
+
+    return StandardsTable(original_standards)
+
+
+def find_standard_row(path: str, worksheet: str, id_value: Any) -> Optional[int]:
+    """Gets the first row with the ID in column B of a worksheet, from the
+    index built when the workbook was parsed."""
+    worksheets = load_snapshot(path, "original", read_original_workbook)
+    if worksheet not in worksheets:
+        return None
+
+    return worksheets[worksheet]["rows"].get(id_value)
+
 
-    return original_standards
+def mark_standards_compared(worksheets: dict[str, dict[str, Any]],
+                            updates: dict[tuple[str, Any], tuple[Any, Any, Any]]):
+    """Updates the parsed standards with the values written to columns F, G and H."""
+    for (worksheet, id_value), values in updates.items():
+        if worksheet not in worksheets:
+            continue
 
+        row_number = worksheets[worksheet]["rows"].get(id_value)
+        for standard, standard_row in zip(worksheets[worksheet]["standards"],
+                                          worksheets[worksheet]["standard_rows"]):
+            if standard_row == row_number:
+                standard["completed"] = all(value is not None for value in values)
 
-def get_new_standards(path: str) -> list[dict[str, Union[str, None]]]:
-    """Gets the list with the new standards."""
-    new_workbook = load_workbook(path)
-    new_worksheet = new_workbook["Unified Standard"]
-    new_rows = new_worksheet.iter_rows(
-        min_row=4, min_col=1, max_col=3, values_only=True)
+
+@traced("workbooks.read_new")
+def read_new_workbook(path: str) -> dict[str, Any]:
+    """Gets the new standards from the Unified Standard worksheet, with the
+    first row of every value in column A."""
+    new_rows = iter_rows(path, "Unified Standard", min_row=4, min_col=1, max_col=3)
 
     new_standards: list[dict[str, Union[str, None]]] = []
-    for row in new_rows:
+    id_rows: dict[Any, int] = {}
+    for row_number, row in new_rows:
+        if row[0] is not None:
+            id_rows.setdefault(row[0], row_number)
+
         if row[0] and row[1] and row[0] != "Criterion #":
             standard = {
                 "id": row[0],
@@ -59,45 +110,119 @@ def get_new_standards(path: str) -> list[dict[str, Union[str, None]]]:
             }
             new_standards.append(standard)
 
-    return new_standards
+    return {"standards": new_standards, "rows": id_rows}
 
 
-def update_standards(id_value: str, new_id: str, new_text: str, new_level: str,
-                     worksheet_name: str, workbook_path: str
-                     ) -> bool:
-    """Update the standards with new values."""
-    workbook = load_workbook(workbook_path)
-    worksheet = workbook[worksheet_name]
+def get_new_standards(path: str) -> StandardsTable:
+    """Gets the table with the new standards.
+    The workbook is only parsed again when the file changes."""
+    return StandardsTable(load_snapshot(path, "new", read_new_workbook)["standards"])
 
-    row_number = None
 
-    for row in worksheet.iter_rows(min_row=4, min_col=2, max_col=2):
-        if row[0].value == id_value:
-            row_number = row[0].row
-            break
+class WriteSession:
+    """Comparison workbook kept open in memory while its rows are updated.
 
-    if not row_number:
-        return False
+    The updates are queued and written together by `flush`, which saves the
+    workbook only once. The workbook is loaded again if the file changes on
+    disk in the meantime.
+    """
+
+    def __init__(self, workbook_path: str):
+        self.workbook_path = workbook_path
+        self.workbook: Any = None
+        self.loaded_mtime = 0
+        self.pending: dict[tuple[str, str], tuple[str, str, str]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def queue(self, id_value: str, new_id: str, new_text: str, new_level: str,
+              worksheet_name: str):
+        """Queues the new values of a row, replacing any pending ones."""
+        self.pending[(worksheet_name, id_value)] = (new_id, new_text, new_level)
+
+    def load(self):
+        mtime = os.stat(self.workbook_path).st_mtime_ns
+        if self.workbook is None or mtime != self.loaded_mtime:
+            # openpyxl is only needed to write, reading goes through the XML
+            from openpyxl import load_workbook  # pylint: disable=C0415
+            with span("workbooks.load_workbook"):
+                self.workbook = load_workbook(self.workbook_path)
+            self.loaded_mtime = mtime
+
+    def flush(self) -> dict[tuple[str, str], bool]:
+        """Writes every pending update and saves the workbook once.
+
+        Returns whether each (worksheet, ID) row was written. Rows that were not
+        found are dropped, and when the file can not be saved every update stays
+        pending for the next flush.
+        """
+        if not self.pending:
+            return {}
+
+        self.load()
+        # The parsed standards are only kept in sync if they match the file
+        worksheets = current_snapshot(self.workbook_path, "original")
+        results = {}
+        for (worksheet_name, id_value), (new_id, new_text, new_level) in self.pending.items():
+            row_number = find_standard_row(self.workbook_path, worksheet_name, id_value)
+            results[(worksheet_name, id_value)] = bool(row_number)
+            if not row_number:
+                continue
+
+            # Update the values in the row.
+            worksheet = self.workbook[worksheet_name]
+            worksheet[f"F{row_number}"] = new_id
+            worksheet[f"G{row_number}"] = new_text
+            worksheet[f"H{row_number}"] = new_level
+
+        if not any(results.values()):
+            self.pending = {}
+            return results
+
+        try:
+            with span("workbooks.save"):
+                self.workbook.save(self.workbook_path)
+        except PermissionError:
+            print("Please close the file first before updating the standards.")
+            # The updates are already in the workbook in memory, it is loaded
+            # again on the next flush so they are applied to the latest file
+            self.workbook = None
+            return {key: False for key in results}
+
+        self.loaded_mtime = os.stat(self.workbook_path).st_mtime_ns
+        if worksheets is not None:
+            mark_standards_compared(worksheets, {key: values for key, values
+                                                 in self.pending.items() if results[key]})
+            replace_snapshot(self.workbook_path, "original", worksheets)
+
+        self.pending = {}
+        return results
+
+    def close(self):
+        """Flushes the pending updates and releases the workbook."""
+        self.flush()
+        self.workbook = None
 
-    # Update the values in the row.
-    worksheet[f"F{row_number}"] = new_id
-    worksheet[f"G{row_number}"] = new_text
-    worksheet[f"H{row_number}"] = new_level
 
-    try:
-        workbook.save(workbook_path)
-    except PermissionError:
-        print("Please close the file first before updating the standards.")
-        return False
-    return True
+def update_standards(id_value: str, new_id: str, new_text: str, new_level: str,
+                     worksheet_name: str, workbook_path: str
+                     ) -> bool:
+    """Update the standards with new values."""
+    session = WriteSession(workbook_path)
+    session.queue(id_value, new_id, new_text, new_level, worksheet_name)
+    return session.flush().get((worksheet_name, id_value), False)
 
 
 def get_cell_number_from_value(value, workbook_name):
-    workbook = load_workbook(workbook_name)
-    worksheet = workbook.active
+    """Gets the row and the cell in column B of a new standard, from the index
+    built when the Unified Standard was parsed."""
+    row_number = load_snapshot(workbook_name, "new", read_new_workbook)["rows"].get(value)
 
-    for row in worksheet.iter_rows(min_row=4, min_col=1, max_col=1):
-        if row[0].value == value:
-            return row[0].row, row[0].coordinate.replace("A", "B")
+    if row_number:
+        return row_number, f"B{row_number}"
 
     return None
@@ -0,0 +1,308 @@
+"""Contains a streaming reader for the cells of the worksheets.
+
+Loading a whole workbook with openpyxl builds every cell, style and formula
+of every sheet. The standards only need a few columns of some sheets, so this
+reader goes straight to the sheet XML inside the file and yields its rows.
+"""
+
+import datetime
+import posixpath
+import re
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+RELATIONSHIP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CELL_REFERENCE = re.compile(r"^([A-Z]+)(\d+)$")
+
+# Built-in number formats of dates and times, the rest are not needed
+BUILTIN_DATE_FORMATS = {
+    14: "mm-dd-yy", 15: "d-mmm-yy", 16: "d-mmm", 17: "mmm-yy", 18: "h:mm AM/PM",
+    19: "h:mm:ss AM/PM", 20: "h:mm", 21: "h:mm:ss", 22: "m/d/yy h:mm", 45: "mm:ss",
+    46: "[h]:mm:ss", 47: "mmss.0",
+}
+# Same rules as openpyxl to tell the date and duration formats apart: quoted
+# literals and bracketed locales or colors are ignored
+FORMAT_LITERALS = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+DATE_FORMAT = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+TIMEDELTA_FORMAT = re.compile(
+    r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.I)
+
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+
+
+def _local_name(tag: str) -> str:
+    """Removes the namespace from an XML tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def column_index(letters: str) -> int:
+    """Gets the 1-based index of a column from its letters."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+
+def _cast_number(value: str) -> Any:
+    """Converts a numeric cell value the same way openpyxl does."""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def from_excel(value: float, epoch: datetime.datetime, timedelta: bool = False) -> Any:
+    """Converts a date serial number the same way openpyxl does. Serials under
+    one day are times, and the 1900 epoch keeps the leap day Excel made up.
+    """
+    if timedelta:
+        duration = datetime.timedelta(days=value)
+        if duration.microseconds:
+            # Rounded to the millisecond
+            duration = datetime.timedelta(seconds=duration.total_seconds() // 1,
+                                          microseconds=round(duration.microseconds, -3))
+        return duration
+
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        minutes, seconds = divmod(diff.seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return datetime.time(hours, minutes, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+
+def _from_iso(value: str) -> Any:
+    """Converts the value of a cell stored as an ISO 8601 date or time."""
+    value = value.rstrip("Z")
+    if "T" in value:
+        return datetime.datetime.fromisoformat(value)
+    if ":" in value:
+        return datetime.time.fromisoformat(value)
+    return datetime.date.fromisoformat(value)
+
+
+def _read_relationships(archive: zipfile.ZipFile, path: str) -> dict[str, Tuple[str, str]]:
+    """Gets the target and type of every relationship in a .rels file."""
+    relationships = {}
+    base = posixpath.dirname(posixpath.dirname(path))
+    with archive.open(path) as file:
+        for _, element in iterparse(file):
+            if _local_name(element.tag) == "Relationship":
+                target = element.get("Target", "")
+                target = target.lstrip("/") if target.startswith("/") else \
+                    posixpath.normpath(posixpath.join(base, target))
+                relationships[element.get("Id", "")] = (target, element.get("Type", ""))
+
+    return relationships
+
+
+def _find_parts(archive: zipfile.ZipFile,
+                sheet_name: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Gets the paths of the sheet, of the shared strings and of the styles in
+    the archive."""
+    relationships = _read_relationships(archive, "xl/_rels/workbook.xml.rels")
+
+    sheet_path = None
+    with archive.open("xl/workbook.xml") as file:
+        for _, element in iterparse(file):
+            if _local_name(element.tag) == "sheet" and element.get("name") == sheet_name:
+                sheet_path = relationships[element.get(f"{{{RELATIONSHIP_NS}}}id", "")][0]
+                break
+
+    if sheet_path is None:
+        raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+    shared_strings = next((target for target, kind in relationships.values()
+                           if kind.endswith("/sharedStrings")), None)
+    styles = next((target for target, kind in relationships.values()
+                   if kind.endswith("/styles")), None)
+    return sheet_path, shared_strings, styles
+
+
+def _read_shared_strings(archive: zipfile.ZipFile, path: Optional[str]) -> list[str]:
+    """Gets the shared strings table, joining the runs of rich text."""
+    strings: list[str] = []
+    if not path or path not in archive.namelist():
+        return strings
+
+    with archive.open(path) as file:
+        parts: list[str] = []
+        skip = 0  # Depth inside phonetic runs, which openpyxl also ignores
+        for event, element in iterparse(file, events=("start", "end")):
+            name = _local_name(element.tag)
+            if name == "rPh":
+                skip += 1 if event == "start" else -1
+            elif event == "end" and name == "t" and not skip:
+                parts.append(element.text or "")
+            elif event == "end" and name == "si":
+                strings.append("".join(parts))
+                parts = []
+                element.clear()
+
+    return strings
+
+
+def _read_date_styles(archive: zipfile.ZipFile, path: Optional[str]) -> dict[int, bool]:
+    """Gets the cell styles with a date or time number format, and whether
+    each of them is a duration."""
+    date_styles: dict[int, bool] = {}
+    if not path or path not in archive.namelist():
+        return date_styles
+
+    with archive.open(path) as file:
+        custom_formats: dict[int, str] = {}
+        in_cell_styles = False
+        style = 0
+        for event, element in iterparse(file, events=("start", "end")):
+            name = _local_name(element.tag)
+            if name == "numFmt" and event == "end":
+                custom_formats[int(element.get("numFmtId", 0))] = element.get("formatCode", "")
+            elif name == "cellXfs":
+                in_cell_styles = event == "start"
+            elif name == "xf" and event == "end" and in_cell_styles:
+                format_id = int(element.get("numFmtId", 0))
+                code = custom_formats.get(format_id, BUILTIN_DATE_FORMATS.get(format_id, ""))
+                code = code.split(";")[0]  # Only the format of positive numbers
+                if DATE_FORMAT.search(FORMAT_LITERALS.sub("", code)):
+                    date_styles[style] = TIMEDELTA_FORMAT.search(code) is not None
+                style += 1
+
+    return date_styles
+
+
+def _read_epoch(archive: zipfile.ZipFile) -> datetime.datetime:
+    """Gets the day the date serial numbers of the workbook count from."""
+    with archive.open("xl/workbook.xml") as file:
+        for _, element in iterparse(file):
+            if _local_name(element.tag) == "workbookPr":
+                if element.get("date1904") in ("1", "true"):
+                    return MAC_EPOCH
+                break
+    return WINDOWS_EPOCH
+
+
+def _cell_value(element, cell_type: str, shared_strings: list[str]) -> Any:
+    """Gets the value of a cell element as openpyxl would give it."""
+    value = None
+    formula = None
+    texts = []
+    for child in element.iter():
+        name = _local_name(child.tag)
+        if name == "v":
+            value = child.text
+        elif name == "f":
+            formula = child.text
+        elif name == "t" and cell_type == "inlineStr":
+            texts.append(child.text or "")
+
+    if formula:
+        return f"={formula}"
+    if cell_type == "inlineStr":
+        return "".join(texts) if texts else None
+    if value is None:
+        return None
+    if cell_type == "s":
+        return shared_strings[int(value)]
+    if cell_type == "b":
+        return bool(int(value))
+    if cell_type in ("str", "e", "d"):
+        return _from_iso(value) if cell_type == "d" else value
+    return _cast_number(value)
+
+
+class WorkbookReader:
+    """Open xlsx archive whose sheets are read one after the other, sharing
+    the relationships, the shared strings table and the date styles.
+    The archive is owned by whoever opened it, see `open_workbook`.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.shared_strings: Optional[list[str]] = None
+        # Cell styles of dates, and whether each of them is a duration
+        self.date_styles: Optional[dict[int, bool]] = None
+        self.epoch = _read_epoch(archive)
+
+    def sheet_names(self) -> list[str]:
+        """Gets the names of the sheets, in the order of the workbook."""
+        names = []
+        with self.archive.open("xl/workbook.xml") as file:
+            for _, element in iterparse(file):
+                if _local_name(element.tag) == "sheet":
+                    names.append(element.get("name", ""))
+        return names
+
+    def _sheet_path(self, sheet_name: str) -> str:
+        """Gets the path of the sheet, reading the parts shared by every sheet
+        the first time."""
+        sheet_path, shared_strings_path, styles_path = _find_parts(self.archive, sheet_name)
+        if self.shared_strings is None:
+            self.shared_strings = _read_shared_strings(self.archive, shared_strings_path)
+        if self.date_styles is None:
+            self.date_styles = _read_date_styles(self.archive, styles_path)
+        return sheet_path
+
+    def iter_rows(self, sheet_name: str, min_row: int = 1, min_col: int = 1,
+                  max_col: Optional[int] = None) -> Iterator[Tuple[int, tuple]]:
+        """Yields the number and the values of every row of the sheet that has
+        cells, from `min_row` on and only between `min_col` and `max_col`.
+        """
+        with self.archive.open(self._sheet_path(sheet_name)) as file:
+            row_number = 0
+            for _, element in iterparse(file):
+                if _local_name(element.tag) != "row":
+                    continue
+
+                row_number = int(element.get("r") or row_number + 1)
+                if row_number < min_row:
+                    element.clear()
+                    continue
+
+                cells: dict[int, Any] = {}
+                column = 0
+                for cell in element:
+                    if _local_name(cell.tag) != "c":
+                        continue
+                    reference = CELL_REFERENCE.match(cell.get("r") or "")
+                    column = column_index(reference.group(1)) if reference else column + 1
+                    if column >= min_col and (max_col is None or column <= max_col):
+                        cells[column] = self._cell_value(cell)
+                element.clear()
+
+                if cells:
+                    last = max_col if max_col is not None else max(cells)
+                    yield row_number, tuple(cells.get(i) for i in range(min_col, last + 1))
+
+    def _cell_value(self, cell) -> Any:
+        """Gets the value of a cell, as a date when its style has a date format."""
+        cell_type = cell.get("t", "n")
+        value = _cell_value(cell, cell_type, self.shared_strings or [])
+        date_styles = self.date_styles or {}
+        style = int(cell.get("s", 0))
+        if cell_type != "n" or not isinstance(value, (int, float)) or style not in date_styles:
+            return value
+
+        try:
+            return from_excel(value, self.epoch, date_styles[style])
+        except (OverflowError, ValueError):
+            return "#VALUE!"  # Out of the range of dates, openpyxl makes it an error
+
+
+@contextmanager
+def open_workbook(path: str) -> Iterator[WorkbookReader]:
+    """Opens the archive of a workbook for as long as the reader is used."""
+    with zipfile.ZipFile(path) as archive:
+        yield WorkbookReader(archive)
+
+
+def iter_rows(path: str, sheet_name: str, min_row: int = 1, min_col: int = 1,
+              max_col: Optional[int] = None) -> Iterator[Tuple[int, tuple]]:
+    """Yields the rows of a single sheet, see `WorkbookReader.iter_rows`."""
+    with open_workbook(path) as reader:
+        yield from reader.iter_rows(sheet_name, min_row, min_col, max_col)
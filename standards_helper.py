@@ -1,8 +1,10 @@
 """Contains the logic for the program that helps link the standards."""
 
+import argparse
 from typing import Any, Tuple
 
 import standards.config as cfg
+from standards.batch import REPORT_FORMATS, BatchOptions, run_batch
 from standards.text_comparison import (cosine_similarity_compare,
                                        edit_distance_compare)
 from standards.workbooks import (get_new_standards, get_original_standards,
@@ -19,11 +21,6 @@ def calculate_max_similarity(original_text, new_text):
     return max_similarity
 
 
-original_standards = get_original_standards(
-    cfg.original_standards_file, cfg.original_standards_ws[0])
-new_standards = get_new_standards(cfg.new_standards_file)
-
-
 def show_matches(original_standard, matches, user_option, amount=10):
     if original_standard:
         print(f"Original standard: {original_standard['text']}")
@@ -63,96 +60,130 @@ def get_text_comparisons(text1: str, text2: str) -> Tuple[float, float]:
     return (max_edit_dist, edit_dists[edit_dists.index(max_edit_dist)])
 
 
-# Let the user choose the original standard
-while True:
-    matches_to_show = 10
-
-    user_option = input(
-        "Please enter the number of the standard to compare (enter 'quit' to exit): ")
-
-    if user_option.lower() in ['e', 'exit', 'q', 'quit']:
-        break
-
-    # Ask the user for keywords
-    keywords_input = input(
-        "Enter keywords separated by commas (or leave blank): ")
-
-    # Process keywords
-    keywords = [kw.strip() for kw in keywords_input.split(",")
-                if kw.strip()] if keywords_input else []
-
-    matches: Any = {
-        user_option: {}
-    }
-    original_standard = next(
-        (std for std in original_standards if std["id"] == user_option), None)
-
-    if original_standard:
-        for new_standard in new_standards:
-            if new_standard["text"] and original_standard["text"]:
-                cosine_sim, edit_dist = get_text_comparisons(
-                    original_standard["text"], new_standard["text"])
-
-                if keywords:
-                    cosine_weight = 0.3
-                    edit_weight = 0.3
-                    keyword_weight = 0.4
-
-                    keyword_proportion = len(
-                        [kw for kw in keywords if kw in new_standard["text"]]) / len(keywords)
-                    weighted_similarity = cosine_sim * cosine_weight + edit_dist * \
-                        edit_weight + keyword_proportion * keyword_weight
-
-                    matches[user_option][new_standard["id"]] = {
-                        "weighted_similarity": weighted_similarity,
-                        "cosine": cosine_sim,
-                        "edit": edit_dist,
-                        "keyword_proportion": keyword_proportion,
-                    }
-                else:
-                    cosine_weight = 0.5
-                    edit_weight = 0.5
-
-                    weighted_similarity = cosine_sim * cosine_weight + \
-                        edit_dist * edit_weight
-
-                    matches[user_option][new_standard["id"]] = {
-                        "weighted_similarity": weighted_similarity,
-                        "cosine": cosine_sim,
-                        "edit": edit_dist,
-                    }
-
-    show_matches(original_standard, matches, user_option)
-
-    # Ask the user for the next action: show more matches, choose another
-    # standard, exit or write the new standards to the current standards file
-    next_action = input(
-        "Enter 'more' to show more matches, 'choose' to choose another standard, 'exit' to exit, or 'write' to write the new standards to the current standards file: ")
-
-    if next_action.lower() in ['e', 'exit', 'q', 'quit']:
-        break
-
-    if next_action.lower() in ['m', 'more']:
-        matches_to_show += 10
-        show_matches(original_standard, matches, user_option, matches_to_show)
-
-    if next_action.lower() in ['c', 'choose']:
-        continue
-
-    if next_action.lower() in ['w', 'write']:
-        # Write the new standards to the current standards file
-        standard_id = input(
-            "Enter the index of the standard to write to the current standards file: ")
-
-        if standard_id in matches[user_option]:
-            print("Writing the new standard to the current standards file.")
-            match = matches[user_option][standard_id]
-            # Filter the new standard to show the one that matches the id
-            new_standard = filter(
-                lambda x: x["id"] == standard_id, new_standards)
-            new_standard = next(new_standard, None)
-            if new_standard:
-                print(f"New standard: {new_standard}")
-                update_standards(user_option, new_standard["id"] or "",
-                                 new_standard["text"] or "", new_standard["level"] or "", "RCS")
+def run_interactive():
+    """Lets the user compare the standards of the RCS worksheet one by one."""
+    original_standards = get_original_standards(
+        cfg.original_standards_file, cfg.original_standards_ws[0])
+    new_standards = get_new_standards(cfg.new_standards_file)
+
+    # Let the user choose the original standard
+    while True:
+        matches_to_show = 10
+
+        user_option = input(
+            "Please enter the number of the standard to compare (enter 'quit' to exit): ")
+
+        if user_option.lower() in ['e', 'exit', 'q', 'quit']:
+            break
+
+        # Ask the user for keywords
+        keywords_input = input(
+            "Enter keywords separated by commas (or leave blank): ")
+
+        # Process keywords
+        keywords = [kw.strip() for kw in keywords_input.split(",")
+                    if kw.strip()] if keywords_input else []
+
+        matches: Any = {
+            user_option: {}
+        }
+        original_standard = original_standards.get(user_option)
+
+        if original_standard:
+            for new_standard in new_standards:
+                if new_standard["text"] and original_standard["text"]:
+                    cosine_sim, edit_dist = get_text_comparisons(
+                        original_standard["text"], new_standard["text"])
+
+                    if keywords:
+                        cosine_weight = 0.3
+                        edit_weight = 0.3
+                        keyword_weight = 0.4
+
+                        keyword_proportion = len(
+                            [kw for kw in keywords if kw in new_standard["text"]]) / len(keywords)
+                        weighted_similarity = cosine_sim * cosine_weight + edit_dist * \
+                            edit_weight + keyword_proportion * keyword_weight
+
+                        matches[user_option][new_standard["id"]] = {
+                            "weighted_similarity": weighted_similarity,
+                            "cosine": cosine_sim,
+                            "edit": edit_dist,
+                            "keyword_proportion": keyword_proportion,
+                        }
+                    else:
+                        cosine_weight = 0.5
+                        edit_weight = 0.5
+
+                        weighted_similarity = cosine_sim * cosine_weight + \
+                            edit_dist * edit_weight
+
+                        matches[user_option][new_standard["id"]] = {
+                            "weighted_similarity": weighted_similarity,
+                            "cosine": cosine_sim,
+                            "edit": edit_dist,
+                        }
+
+        show_matches(original_standard, matches, user_option)
+
+        # Ask the user for the next action: show more matches, choose another
+        # standard, exit or write the new standards to the current standards file
+        next_action = input(
+            "Enter 'more' to show more matches, 'choose' to choose another standard, 'exit' to exit, or 'write' to write the new standards to the current standards file: ")
+
+        if next_action.lower() in ['e', 'exit', 'q', 'quit']:
+            break
+
+        if next_action.lower() in ['m', 'more']:
+            matches_to_show += 10
+            show_matches(original_standard, matches, user_option, matches_to_show)
+
+        if next_action.lower() in ['c', 'choose']:
             continue
+
+        if next_action.lower() in ['w', 'write']:
+            # Write the new standards to the current standards file
+            standard_id = input(
+                "Enter the index of the standard to write to the current standards file: ")
+
+            if standard_id in matches[user_option]:
+                print("Writing the new standard to the current standards file.")
+                match = matches[user_option][standard_id]
+                # Filter the new standard to show the one that matches the id
+                chosen_standard = next(
+                    (std for std in new_standards if std["id"] == standard_id), None)
+                if chosen_standard:
+                    print(f"New standard: {chosen_standard}")
+                    update_standards(user_option, chosen_standard["id"] or "",
+                                     chosen_standard["text"] or "",
+                                     chosen_standard["level"] or "", "RCS",
+                                     cfg.original_standards_file)
+                continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", metavar="REPORT",
+                        help="rank every worksheet without asking and write the top candidates "
+                        f"to this report ({', '.join(REPORT_FORMATS)})")
+    parser.add_argument("--original", default=cfg.original_standards_file,
+                        help="workbook with the original standards")
+    parser.add_argument("--new", default=cfg.new_standards_file,
+                        help="workbook with the Unified Standard")
+    parser.add_argument("-k", type=int, default=10, help="candidates kept per standard")
+    parser.add_argument("--keywords", default="", help="keywords separated by commas")
+    parser.add_argument("--workers", type=int, help="worker processes, all cores by default")
+    args = parser.parse_args()
+
+    if not args.batch:
+        run_interactive()
+        return
+
+    keywords = [kw.strip() for kw in args.keywords.split(",") if kw.strip()]
+    rows = run_batch(args.original, args.new, args.batch,
+                     BatchOptions(args.k, keywords, args.workers))
+    print(f"Wrote {rows} suggestions to {args.batch}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Checks that the keyword index gives the same proportions as checking every text."""
+
+import numpy as np
+import pytest
+
+from standards.keywords import KeywordIndex
+
+TEXTS = ["Passwords shall be rotated.", "PASSWORD length", "Logs shall be kept\nfor a year.",
+         "", "Encryption of data at rest", "ab", "Ña ñandú", "data data data"]
+
+
+def keyword_proportion(text: str, keywords: list[str]) -> float:
+    """Gets the proportion of the keywords in the text the way the app did
+    before the index."""
+    return len([kw for kw in keywords if kw in text]) / len(keywords)
+
+
+@pytest.mark.parametrize("keywords", [
+    ["shall"], ["Password", "password"], ["data", "data"], ["a", "ab", "Ña"],
+    ["kept\nfor"], ["missing", "rest"], [" "], ["rotated.", "year.", "ñandú"],
+])
+def test_proportions_match_every_text(keywords: list[str]):
+    index = KeywordIndex(TEXTS)
+    expected = np.array([keyword_proportion(text, keywords) for text in TEXTS])
+    np.testing.assert_array_equal(index.proportions(keywords), expected)
+    # The second time comes from the kept masks
+    np.testing.assert_array_equal(index.proportions(keywords), expected)
+
+
+def test_no_keywords():
+    np.testing.assert_array_equal(KeywordIndex(TEXTS).proportions([]), np.zeros(len(TEXTS)))
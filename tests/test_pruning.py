@@ -0,0 +1,63 @@
+"""Checks that the pruned edit distance values are the same as the exhaustive ones."""
+
+import random
+
+import numpy as np
+import pytest
+
+from standards.corpus import CorpusIndex
+from standards.text_comparison import (edit_distance_compare, edit_distance_compare_many,
+                                       weigh_similarities)
+
+WORDS = ("access account audit backup control data device encrypt firewall incident "
+         "key log monitor network password patch policy record risk role server "
+         "session system token user shall must review verify").split()
+
+
+def random_text(rng: random.Random, multiline_ratio: float = 0.3) -> str:
+    """Gets a text of one or more lines of random words, of very different lengths."""
+    lines = rng.randint(2, 4) if rng.random() < multiline_ratio else 1
+    return "\n".join(" ".join(rng.choices(WORDS, k=rng.randint(2, 30)))
+                     for _ in range(lines))
+
+
+@pytest.fixture(name="corpus", scope="module")
+def fixture_corpus() -> list[str]:
+    rng = random.Random(3)
+    texts = [random_text(rng) for _ in range(400)]
+    return texts + texts[:20]  # Equal texts give ties in the top k
+
+
+@pytest.mark.parametrize("min_score", [0.0, 0.4, 0.7, 1.0])
+def test_compare_many_matches_compare(corpus: list[str], min_score: float):
+    text = corpus[0].split("\n")[0]
+    scores = edit_distance_compare_many(text, corpus, min_scores=min_score)
+
+    expected = np.array([edit_distance_compare(text, candidate) for candidate in corpus])
+    computed = ~np.isnan(scores)
+    np.testing.assert_array_equal(scores[computed], expected[computed])
+    # Only the candidates under the minimum score are skipped
+    assert computed[expected >= min_score].all()
+
+
+@pytest.mark.parametrize("k", [1, 5, 10, 50])
+@pytest.mark.parametrize("with_keywords", [False, True])
+def test_pruned_compare_keeps_top_k(corpus: list[str], k: int, with_keywords: bool):
+    index = CorpusIndex([{"id": str(i), "text": text} for i, text in enumerate(corpus)])
+    rng = random.Random(k)
+
+    for text in [random_text(rng) for _ in range(5)] + corpus[:5]:
+        keyword_proportion = np.array([rng.random() for _ in corpus]) \
+            if with_keywords else None
+        cosine, edit = index.compare(text)
+        pruned_cosine, pruned_edit = index.compare(text, k, keyword_proportion)
+
+        # Every value computed is the same as the exhaustive one
+        computed = ~np.isnan(pruned_edit)
+        np.testing.assert_allclose(pruned_edit[computed], edit[computed])
+        np.testing.assert_allclose(pruned_cosine[computed], cosine[computed])
+
+        # Every standard of the exhaustive top k keeps its values
+        weighted = weigh_similarities(cosine, edit, keyword_proportion)
+        top_k = weighted >= np.sort(weighted)[-k]
+        assert computed[top_k].all()
@@ -0,0 +1,53 @@
+"""Checks that the search index gives the same standards as the linear filter."""
+
+import random
+
+import pytest
+
+from standards.columns import StandardsTable
+from standards.search import SearchIndex
+
+TEXTS = ["Passwords shall be rotated.", "PASSWORD length", "Logs shall be kept\nfor a year.",
+         "Backups are tested", "", "Encryption of data at rest", "ab", "Ña ñandú"]
+QUERIES = ["", "p", "pa", "pas", "pass", "passw", "Pass", "U1", "u1", "U1.", "U1.1", "u1.1",
+           "shall", "shall be", "Logs", "a year", "\n", " ", "zzz", "ñan", "Ña", "ab", "U10"]
+
+
+def linear_filter(standards, criteria: str) -> list:
+    """Filters the standards the way the filter boxes did before the index."""
+    if criteria == "":
+        return list(standards)
+    return [standard for standard in standards
+            if standard and standard["text"] and standard["id"] and (
+                standard["id"].startswith(criteria) or criteria in standard["id"].lower() or
+                standard["text"].lower().startswith(criteria.lower()) or
+                criteria in standard["text"].lower())]
+
+
+@pytest.fixture(name="standards")
+def fixture_standards() -> list[dict]:
+    rng = random.Random(11)
+    standards = [{"id": f"U{i // 10 + 1}.{i % 10 + 1}", "text": rng.choice(TEXTS),
+                  "level": "L1"} for i in range(200)]
+    standards[3]["id"] = ""  # Standards without an ID never match
+    return standards
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_linear_filter(standards: list[dict], query: str):
+    assert SearchIndex(standards).search(query) == linear_filter(standards, query)
+
+
+def test_typing_narrows_previous_results(standards: list[dict]):
+    index = SearchIndex(standards)
+    for typed in ["s", "sh", "sha", "shal", "shall", "shall ", "shall b", "", "U", "U2",
+                  "U2.", "U2.1", "U2", "Ba", "Bac", "Back"]:
+        assert index.search(typed) == linear_filter(standards, typed)
+
+
+def test_search_table(standards: list[dict]):
+    table = StandardsTable(standards)
+    index = SearchIndex(table)
+    for query in QUERIES:
+        assert [dict(standard) for standard in index.search(query)] == \
+            linear_filter(standards, query)
@@ -0,0 +1,70 @@
+"""Checks that the streaming reader gives the same values as openpyxl."""
+
+import datetime
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+
+from standards.xlsx import iter_rows, open_workbook
+
+ROWS = [
+    ["No.", "Criteria", "Level", "Completed", "Date"],
+    [1, "Passwords shall be rotated.\nEvery 90 days.", "L1", True, datetime.date(2024, 3, 1)],
+    [2.5, "Logs shall be kept.", None, False, datetime.datetime(2023, 12, 31, 23, 59, 30)],
+    ["3", "=A2*2", "L2", None, datetime.time(9, 30)],
+    [None, "Backups shall be tested.", "L3", "Yes", datetime.timedelta(hours=30)],
+    [4, "Old entry.", "L1", 1e-7, datetime.datetime(1900, 2, 1)],
+]
+
+
+def write_sample(path: str, epoch: datetime.datetime):
+    """Writes a workbook with every kind of value the reader converts."""
+    workbook = Workbook()
+    workbook.epoch = epoch
+    sheet = workbook.active
+    sheet.title = "Standards"
+    for row in ROWS:
+        sheet.append(row)
+    sheet["F2"] = 45000.25
+    sheet["F2"].number_format = "yyyy-mm-dd hh:mm"
+    sheet["F3"] = 0.125
+    sheet["F3"].number_format = "0.00%"
+    sheet["F4"] = 1.5
+    sheet["F4"].number_format = '[h]:mm:ss;"negative"'
+    sheet["F5"] = 45000
+    sheet["F5"].number_format = '"Day" 0'
+    sheet["H9"] = "Far away cell"
+
+    other = workbook.create_sheet("Other")
+    other.append(["Second", datetime.date(2020, 1, 1)])
+    workbook.save(path)
+
+
+@pytest.mark.parametrize("epoch", [CALENDAR_WINDOWS_1900, CALENDAR_MAC_1904])
+def test_rows_match_openpyxl(tmp_path, epoch: datetime.datetime):
+    path = str(tmp_path / "sample.xlsx")
+    write_sample(path, epoch)
+
+    workbook = load_workbook(path)
+    for sheet_name in workbook.sheetnames:
+        expected = {row[0].row: tuple(cell.value for cell in row)
+                    for row in workbook[sheet_name].iter_rows(max_col=8)
+                    if any(cell.value is not None for cell in row)}
+        rows = dict(iter_rows(path, sheet_name, max_col=8))
+        assert rows == expected
+
+
+def test_columns_and_sheets(tmp_path):
+    path = str(tmp_path / "sample.xlsx")
+    write_sample(path, CALENDAR_WINDOWS_1900)
+
+    with open_workbook(path) as reader:
+        assert reader.sheet_names() == ["Standards", "Other"]
+        rows = list(reader.iter_rows("Standards", min_row=2, min_col=2, max_col=3))
+        assert rows[0] == (2, ("Passwords shall be rotated.\nEvery 90 days.", "L1"))
+        assert [number for number, _ in rows] == [2, 3, 4, 5, 6]
+        assert list(reader.iter_rows("Other")) == [(1, ("Second", datetime.datetime(2020, 1, 1)))]
+
+        with pytest.raises(KeyError):
+            list(reader.iter_rows("Missing"))